@@ -1,5 +1,62 @@
+import base64
+import json
 import os
+import time
+import uuid
 import boto3
+from boto3.dynamodb.conditions import Attr
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BATCH_GET_LIMIT = 100
+BATCH_RETRIES = 5
+BATCH_BACKOFF = 0.05
+
+# Replaced with a fresh token on every write and exposed as the ETag
+VERSION_ATTRIBUTE = 'version'
+
+# Attributes a preference may hold besides its user_id key
+PREFERENCE_SCHEMA = {
+    'listing_type': str,
+    'property_type': str,
+    'property_type_code': str,
+    'min_price': Decimal,
+    'max_price': Decimal,
+    'min_floor_size': Decimal,
+    'max_floor_size': Decimal,
+    'min_build_year': Decimal,
+    'max_build_year': Decimal,
+    'bedrooms': str,
+    'floor_level': str,
+    'tenure': str,
+    'district': str,
+    'job_frequency_hours': Decimal
+}
+
+# Built once per execution environment and reused by warm invocations
+_resources = {}
+_tables = {}
+
+
+def get_dynamo_resource():
+    region = os.environ.get('REGION', 'ap-southeast-1')
+    aws_environment = os.environ.get('AWSENV', 'AWS_SAM_LOCAL')
+
+    key = (region, aws_environment)
+    if key not in _resources:
+        if aws_environment == 'AWS_SAM_LOCAL':
+            _resources[key] = boto3.resource(
+                'dynamodb', endpoint_url="http://dynamodb:8000"
+            )
+        else:
+            _resources[key] = boto3.resource('dynamodb', region_name=region)
+
+    return _resources[key]
 
 
 def get_dynamo_table():
@@ -7,9 +64,184 @@ def get_dynamo_table():
     region = os.environ.get('REGION', 'ap-southeast-1')
     aws_environment = os.environ.get('AWSENV', 'AWS_SAM_LOCAL')
 
-    if aws_environment == 'AWS_SAM_LOCAL':
-        preferences_table = boto3.resource('dynamodb', endpoint_url="http://dynamodb:8000")
-    else:
-        preferences_table = boto3.resource('dynamodb', region_name=region)
+    key = (table_name, region, aws_environment)
+    if key not in _tables:
+        _tables[key] = get_dynamo_resource().Table(table_name)
+
+    return _tables[key]
+
+
+def reset_dynamo_table():
+    """Drop cached tables so the next call builds a fresh resource"""
+    _tables.clear()
+    _resources.clear()
+
+
+def batch_get_items(keys: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Fetch keys in BatchGetItem sized chunks, retrying unprocessed keys
+    with backoff. Returns the items found and any keys still unprocessed
+    after BATCH_RETRIES attempts."""
+    table = get_dynamo_table()
+    items = []
+    unprocessed = []
+    for i in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {table.name: {'Keys': keys[i:i + BATCH_GET_LIMIT]}}
+        for attempt in range(BATCH_RETRIES):
+            response = get_dynamo_resource().batch_get_item(RequestItems=request)
+            items += response['Responses'].get(table.name, [])
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+            time.sleep(BATCH_BACKOFF * 2 ** attempt)
+        if request:
+            unprocessed += request[table.name]['Keys']
+    return items, unprocessed
+
+
+def batch_write_items(puts: List[Dict], deletes: List[Dict]) -> None:
+    """The batch writer chunks requests at the BatchWriteItem limit and
+    resends unprocessed items itself"""
+    with get_dynamo_table().batch_writer(overwrite_by_pkeys=['user_id']) as batch:
+        for item in puts:
+            batch.put_item(Item={**item, VERSION_ATTRIBUTE: new_version()})
+        for key in deletes:
+            batch.delete_item(Key=key)
+
+
+def from_dynamo(obj):
+    """Convert boto3's DynamoDB types to plain JSON types in one pass:
+    Decimals become ints where whole and floats otherwise, sets become
+    sorted lists"""
+    if isinstance(obj, dict):
+        return {key: from_dynamo(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [from_dynamo(value) for value in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted(from_dynamo(value) for value in obj)
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    return obj
+
+
+def to_json(obj) -> str:
+    """Serialise items for a response body, using orjson when the
+    function ships it and the standard library otherwise"""
+    obj = from_dynamo(obj)
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def encode_token(last_key: Optional[Dict]) -> Optional[str]:
+    if not last_key:
+        return
+    return base64.urlsafe_b64encode(to_json(last_key).encode()).decode()
+
+
+def decode_token(token: Optional[str]) -> Optional[Dict]:
+    if not token:
+        return
+    return json.loads(base64.urlsafe_b64decode(token.encode()), parse_float=Decimal)
+
+
+def scan_page(limit: int,
+              start_key: Optional[Dict] = None,
+              fields: Optional[List[str]] = None,
+              filters: Optional[Dict] = None,
+              segment: Optional[int] = None,
+              total_segments: Optional[int] = None
+              ) -> Tuple[List[Dict], Optional[Dict]]:
+    """Scan a single page. Filters are equality matches applied server
+    side, so a page may hold fewer than limit items and still have more
+    to come."""
+    kwargs = {'Limit': limit}
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+    if fields:
+        names = {f'#f{i}': field for i, field in enumerate(fields)}
+        kwargs['ProjectionExpression'] = ', '.join(names)
+        kwargs['ExpressionAttributeNames'] = names
+    if filters:
+        conditions = [Attr(key).eq(value) for key, value in filters.items()]
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        kwargs['FilterExpression'] = expression
+    if total_segments:
+        kwargs['Segment'] = segment
+        kwargs['TotalSegments'] = total_segments
+    response = get_dynamo_table().scan(**kwargs)
+    return response['Items'], response.get('LastEvaluatedKey')
+
+
+def scan_pages(limit: int, **kwargs) -> Iterator[List[Dict]]:
+    """Yield every page of a scan, holding only one page in memory"""
+    start_key = None
+    while True:
+        items, start_key = scan_page(limit, start_key, **kwargs)
+        yield items
+        if not start_key:
+            return
+
+
+def to_attribute_value(key: str, value):
+    """Validate a preference attribute against PREFERENCE_SCHEMA, turning
+    numbers into the Decimals DynamoDB expects"""
+    kind = PREFERENCE_SCHEMA.get(key)
+    if kind is None:
+        raise ValueError(f'Unknown attribute {key}')
+    if kind is Decimal:
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f'{key} must be a number')
+        return Decimal(str(value))
+    if not isinstance(value, str):
+        raise ValueError(f'{key} must be a string')
+    return value
+
+
+def build_update_expression(changes: Dict) -> Dict:
+    """Build update_item arguments that set only the supplied attributes.
+    Placeholders are used for every name, so reserved words are safe."""
+    if not changes:
+        raise ValueError('No attributes to update')
+    names = {'#version': VERSION_ATTRIBUTE}
+    values = {':version': new_version()}
+    for i, (key, value) in enumerate(changes.items()):
+        names[f'#a{i}'] = key
+        values[f':v{i}'] = to_attribute_value(key, value)
+    return {
+        'UpdateExpression': 'set #version = :version, ' + ', '.join(
+            f'#a{i} = :v{i}' for i in range(len(changes))
+        ),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+def new_version() -> str:
+    return uuid.uuid4().hex
+
+
+def pop_etag(item: Dict) -> Optional[str]:
+    """Move an item's version out of the body and into an ETag value"""
+    version = item.pop(VERSION_ATTRIBUTE, None)
+    if version:
+        return f'"{version}"'
+
+
+def get_header(event: Dict, name: str) -> Optional[str]:
+    """Header names are case insensitive, and HTTP APIs lower case them"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+
 
-    return preferences_table.Table(table_name)
+def parse_etags(value: Optional[str]) -> List[str]:
+    """Versions listed in an If-Match or If-None-Match header"""
+    if not value:
+        return []
+    return [
+        tag.strip().removeprefix('W/').strip('"')
+        for tag in value.split(',')
+    ]
@@ -0,0 +1,59 @@
+import json
+from decimal import Decimal
+from dynamo import batch_get_items, batch_write_items, pop_etag, to_json
+
+
+def lambda_handler(event, context):
+    print(event)
+
+    if not event['body']:
+        return {"statusCode": 400,
+                "headers": {},
+                "body": "Bad Request"}
+
+    try:
+        request = json.loads(event['body'], parse_float=Decimal)
+        if event['rawPath'].endswith(':batchGet'):
+            body = batch_get(request)
+        elif event['rawPath'].endswith(':batchWrite'):
+            body = batch_write(request)
+        else:
+            return {"statusCode": 404,
+                    "headers": {},
+                    "body": "Not Found"}
+
+        return {
+            "statusCode": 200,
+            "headers": {},
+            "body": to_json(body)
+        }
+
+    except Exception as e:
+        print(e)
+        return {"statusCode": 400,
+                "headers": {},
+                "body": "Bad Request"}
+
+
+def batch_get(request):
+    # BatchGetItem rejects duplicate keys in one request
+    user_ids = list(dict.fromkeys(int(user_id) for user_id in request['user_ids']))
+    items, unprocessed = batch_get_items([{"user_id": u} for u in user_ids])
+    for item in items:
+        pop_etag(item)
+    return {
+        "items": items,
+        "unprocessed": [key['user_id'] for key in unprocessed]
+    }
+
+
+def batch_write(request):
+    puts = request.get('put', [])
+    deletes = [{"user_id": int(user_id)} for user_id in request.get('delete', [])]
+    if not puts and not deletes:
+        raise ValueError('Nothing to write')
+    batch_write_items(puts, deletes)
+    return {
+        "written": len(puts),
+        "deleted": len(deletes)
+    }
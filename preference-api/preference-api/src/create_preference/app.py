@@ -1,5 +1,11 @@
 import json
-from dynamo import get_dynamo_table
+from dynamo import (
+    VERSION_ATTRIBUTE,
+    get_dynamo_table,
+    new_version,
+    pop_etag,
+    to_json
+)
 from typing import Dict, Union
 
 
@@ -14,11 +20,12 @@ def lambda_handler(event, context):
     preference: Dict[str, Union[int, str]] = json.loads(event["body"])
 
     try:
+        preference[VERSION_ATTRIBUTE] = new_version()
         db_response = get_dynamo_table().put_item(Item=preference)
         print(db_response)
         return {"statusCode": 201,
-                "headers": {},
-                "body": json.dumps(preference)}
+                "headers": {"ETag": pop_etag(preference)},
+                "body": to_json(preference)}
 
     except Exception as e:
         print(e)
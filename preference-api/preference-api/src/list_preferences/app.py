@@ -0,0 +1,48 @@
+from dynamo import decode_token, encode_token, pop_etag, scan_page, to_json
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+NUMERIC_FILTERS = ('job_frequency_hours',)
+
+
+def lambda_handler(event, context):
+    print(event)
+
+    try:
+        params = event.get('queryStringParameters') or {}
+        limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        fields = [f for f in params.get('fields', '').split(',') if f]
+        filters = {
+            key: int(params[key]) for key in NUMERIC_FILTERS if key in params
+        }
+        segment = None
+        total_segments = None
+        if 'total_segments' in params:
+            segment = int(params['segment'])
+            total_segments = int(params['total_segments'])
+
+        items, last_key = scan_page(
+            limit=limit,
+            start_key=decode_token(params.get('next_token')),
+            fields=fields,
+            filters=filters,
+            segment=segment,
+            total_segments=total_segments
+        )
+        for item in items:
+            pop_etag(item)
+
+        return {
+            "statusCode": 200,
+            "headers": {},
+            "body": to_json({
+                "items": items,
+                "next_token": encode_token(last_key)
+            })
+        }
+
+    except Exception as e:
+        print(e)
+        return {"statusCode": 400,
+                "headers": {},
+                "body": "Bad Request"}
@@ -0,0 +1,61 @@
+import importlib
+from typing import Dict, Optional
+
+# 'src' under the unit tests, empty when deployed with src/ as code root
+PACKAGE = __package__.rpartition('.')[0]
+
+routes = {
+    ('POST', '/preferences'): 'create_preference',
+    ('GET', '/preferences'): 'list_preferences',
+    ('GET', '/preferences/{user_id}'): 'read_preference',
+    ('PUT', '/preferences/{user_id}'): 'update_preference',
+    ('DELETE', '/preferences/{user_id}'): 'delete_preference',
+    ('POST', '/preferences:batchGet'): 'batch_preferences',
+    ('POST', '/preferences:batchWrite'): 'batch_preferences',
+}
+
+
+def lambda_handler(event, context):
+    method = event['requestContext']['http']['method']
+    path = get_path(event)
+    for (route_method, route_path), name in routes.items():
+        if route_method != method:
+            continue
+        path_parameters = match_path(route_path, path)
+        if path_parameters is None:
+            continue
+        event['pathParameters'] = path_parameters
+        return get_handler(name)(event, context)
+
+    return {
+        "statusCode": 404,
+        "headers": {},
+        "body": "Not Found"
+    }
+
+
+def get_path(event) -> str:
+    path = event['rawPath']
+    stage = event['requestContext'].get('stage', '$default')
+    if stage != '$default' and path.startswith(f'/{stage}/'):
+        path = path[len(stage) + 1:]
+    return path.rstrip('/') or '/'
+
+
+def match_path(route_path: str, path: str) -> Optional[Dict[str, str]]:
+    route_parts = route_path.split('/')
+    parts = path.split('/')
+    if len(route_parts) != len(parts):
+        return
+    path_parameters = {}
+    for route_part, part in zip(route_parts, parts):
+        if route_part.startswith('{') and route_part.endswith('}'):
+            path_parameters[route_part[1:-1]] = part
+        elif route_part != part:
+            return
+    return path_parameters
+
+
+def get_handler(name: str):
+    module = f'{PACKAGE}.{name}.app' if PACKAGE else f'{name}.app'
+    return importlib.import_module(module).lambda_handler
@@ -1,6 +1,4 @@
-import json
-from decimal import Decimal
-from dynamo import get_dynamo_table
+from dynamo import get_dynamo_table, get_header, parse_etags, pop_etag, to_json
 
 
 def lambda_handler(event, context):
@@ -11,10 +9,22 @@ def lambda_handler(event, context):
         user_details = get_dynamo_table().get_item(Key={"user_id": user_id})
         print(user_details)
 
+        item = user_details['Item']
+        etag = pop_etag(item)
+        headers = {"ETag": etag} if etag else {}
+        if etag:
+            cached = parse_etags(get_header(event, 'If-None-Match'))
+            if etag.strip('"') in cached or '*' in cached:
+                return {
+                    "statusCode": 304,
+                    "headers": headers,
+                    "body": ""
+                }
+
         return {
             "statusCode": 200,
-            "headers": {},
-            "body": json.dumps(user_details['Item'], cls=DecimalEncoder)
+            "headers": headers,
+            "body": to_json(item)
         }
 
     except Exception as e:
@@ -24,10 +34,3 @@ def lambda_handler(event, context):
             "headers": {},
             "body": "Not Found",
         }
-
-
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return json.JSONEncoder.default(self, obj)
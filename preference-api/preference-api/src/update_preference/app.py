@@ -1,7 +1,15 @@
 import json
-from dynamo import get_dynamo_table
+from botocore.exceptions import ClientError
+from dynamo import (
+    VERSION_ATTRIBUTE,
+    build_update_expression,
+    get_dynamo_table,
+    get_header,
+    parse_etags,
+    pop_etag,
+    to_json
+)
 from typing import Dict, Union
-from decimal import Decimal
 
 
 def lambda_handler(event, context):
@@ -12,56 +20,57 @@ def lambda_handler(event, context):
                 "headers": {},
                 "body": "Bad Request"}
 
+    expected = []
     try:
         preference: Dict[str, Union[int, str]] = json.loads(event["body"])
         search_params = {
             "user_id": int(event['pathParameters']['user_id'])
         }
+        # the key comes from the path and the version is managed here,
+        # only the other attributes are set
+        preference.pop('user_id', None)
+        preference.pop(VERSION_ATTRIBUTE, None)
+        update = build_update_expression(preference)
+        condition = "attribute_exists(user_id)"
+        expected += parse_etags(get_header(event, 'If-Match'))
+        if expected and '*' not in expected:
+            # optimistic concurrency, only write over the version the
+            # caller last read
+            placeholders = [f':expected{i}' for i in range(len(expected))]
+            condition += f" AND #version IN ({', '.join(placeholders)})"
+            update['ExpressionAttributeValues'].update(zip(placeholders, expected))
         db_response = get_dynamo_table().update_item(
             Key=search_params,
-            UpdateExpression=(
-                "set listing_type=:l, "
-                "property_type=:pt, "
-                "property_type_code=:ptc, "
-                "min_price=:minp, "
-                "max_price=:maxp, "
-                "min_floor_size=:minf, "
-                "max_floor_size=:maxf, "
-                "min_build_year=:minb, "
-                "max_build_year=:maxb, "
-                "bedrooms=:b, "
-                "floor_level=:f, "
-                "tenure=:t, "
-                "district=:d, "
-                "job_frequency_hours=:j"
-            ),
-            ExpressionAttributeValues={
-                ":l": preference['listing_type'],
-                ":pt": preference['property_type'],
-                ":ptc": preference['property_type_code'],
-                ":minp": Decimal(str(preference['min_price'])),
-                ":maxp": Decimal(str(preference['max_price'])),
-                ":minf": Decimal(str(preference['min_floor_size'])),
-                ":maxf": Decimal(str(preference['max_floor_size'])),
-                ":minb": Decimal(str(preference['min_build_year'])),
-                ":maxb": Decimal(str(preference['max_build_year'])),
-                ":b": preference['bedrooms'],
-                ":f": preference['floor_level'],
-                ":t": preference['tenure'],
-                ":d": preference['district'],
-                ":j": preference['job_frequency_hours'],
-            },
-            ConditionExpression="attribute_exists(user_id)",
-            ReturnValues="ALL_NEW"
+            ConditionExpression=condition,
+            ReturnValues="UPDATED_NEW",
+            **update
         )
         print(db_response)
 
+        attributes = db_response['Attributes']
         return {
             "statusCode": 200,
-            "headers": {},
-            "body": json.dumps(db_response['Attributes'], cls=DecimalEncoder)
+            "headers": {"ETag": pop_etag(attributes)},
+            "body": to_json(attributes)
         }
 
+    except ClientError as e:
+        print(e)
+        if expected and e.response['Error']['Code'] == \
+                'ConditionalCheckFailedException':
+            # the condition also fails when the item is gone, which is
+            # not a version conflict
+            if not item_exists(search_params):
+                return {"statusCode": 404,
+                        "headers": {},
+                        "body": "Not Found"}
+            return {"statusCode": 412,
+                    "headers": {},
+                    "body": "Precondition Failed"}
+        return {"statusCode": 400,
+                "headers": {},
+                "body": "Bad Request"}
+
     except Exception as e:
         print(e)
         return {"statusCode": 400,
@@ -69,8 +78,14 @@ def lambda_handler(event, context):
                 "body": "Bad Request"}
 
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return json.JSONEncoder.default(self, obj)
+def item_exists(key: Dict) -> bool:
+    """Whether the item is stored, assuming it is when the read fails"""
+    try:
+        response = get_dynamo_table().get_item(
+            Key=key,
+            ProjectionExpression='user_id'
+        )
+    except ClientError as e:
+        print(e)
+        return True
+    return 'Item' in response
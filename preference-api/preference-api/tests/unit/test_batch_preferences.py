@@ -0,0 +1,109 @@
+import json
+import sys
+from unittest import main, TestCase, mock
+import os
+
+import boto3
+from moto import mock_dynamodb
+
+
+@mock.patch.dict(
+    os.environ, {'TABLE': 'Mock_Preferences',
+                 'REGION': 'ap-southeast-1',
+                 'AWSENV': 'MOCK'}
+)
+@mock_dynamodb
+class TestBatchPreferences(TestCase):
+    def setUp(self) -> None:
+        sys.path.append(os.getcwd() + '/layers/python')
+        self.dynamodb = boto3.client('dynamodb', region_name='ap-southeast-1')
+        self.dynamodb.create_table(
+            TableName="Mock_Preferences",
+            KeySchema=[
+                {"AttributeName": "user_id", "KeyType": "HASH"}
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "N"}
+            ],
+            ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1}
+        )
+
+    def tearDown(self) -> None:
+        self.dynamodb.delete_table(TableName='Mock_Preferences')
+        from dynamo import reset_dynamo_table
+        reset_dynamo_table()
+        sys.path.remove(os.getcwd() + '/layers/python')
+
+    def test_batch_write_then_get(self):
+        from src.batch_preferences import app
+
+        with open('tests/test_events/batch_write_preferences.json', 'r') as f:
+            write_event = json.load(f)
+        with open('tests/test_events/batch_get_preferences.json', 'r') as f:
+            get_event = json.load(f)
+
+        write_response = app.lambda_handler(write_event, '')
+        get_response = app.lambda_handler(get_event, '')
+        body = json.loads(get_response['body'])
+
+        self.assertEqual(write_response['statusCode'], 200)
+        self.assertEqual(json.loads(write_response['body'])['written'], 2)
+        self.assertEqual(get_response['statusCode'], 200)
+        items = sorted(body['items'], key=lambda item: item['user_id'])
+        self.assertEqual([item['user_id'] for item in items], [1, 2])
+        self.assertEqual(items[1]['listing_type'], 'Rent')
+        self.assertEqual(body['unprocessed'], [])
+
+    def test_batch_write_delete(self):
+        from src.batch_preferences import app
+
+        with open('tests/test_events/batch_write_preferences.json', 'r') as f:
+            event = json.load(f)
+        app.lambda_handler(event, '')
+        event['body'] = json.dumps({'delete': [1, 2]})
+
+        response = app.lambda_handler(event, '')
+
+        self.assertEqual(json.loads(response['body'])['deleted'], 2)
+        self.assertEqual(
+            self.dynamodb.scan(TableName='Mock_Preferences')['Count'], 0
+        )
+
+    def test_batch_get_chunks_and_retries_unprocessed_keys(self):
+        from dynamo import batch_get_items, get_dynamo_resource
+
+        resource = get_dynamo_resource()
+        responses = [
+            {'Responses': {'Mock_Preferences': [{'user_id': 1}]},
+             'UnprocessedKeys': {'Mock_Preferences': {'Keys': [{'user_id': 2}]}}},
+            {'Responses': {'Mock_Preferences': [{'user_id': 2}]}},
+            {'Responses': {'Mock_Preferences': [{'user_id': 150}]}}
+        ]
+        keys = [{'user_id': i} for i in range(1, 151)]
+
+        with mock.patch.object(resource, 'batch_get_item',
+                               side_effect=responses) as batch_get_item, \
+                mock.patch('dynamo.time.sleep'):
+            items, unprocessed = batch_get_items(keys)
+
+        self.assertEqual(batch_get_item.call_count, 3)
+        first_keys = batch_get_item.call_args_list[0].kwargs['RequestItems']
+        self.assertEqual(len(first_keys['Mock_Preferences']['Keys']), 100)
+        self.assertEqual(items, [{'user_id': 1}, {'user_id': 2}, {'user_id': 150}])
+        self.assertEqual(unprocessed, [])
+
+    def test_batch_failure(self):
+        from src.batch_preferences import app
+
+        with open('tests/test_events/batch_get_preferences.json', 'r') as f:
+            event = json.load(f)
+        event['body'] = json.dumps({'ids': [1]})
+
+        response = app.lambda_handler(event, '')
+
+        self.assertEqual(response['statusCode'], 400)
+        self.assertEqual(response['body'], 'Bad Request')
+
+
+if __name__ == '__main__':
+    main()
@@ -30,6 +30,8 @@ class TestCreatePreference(TestCase):
 
     def tearDown(self) -> None:
         self.dynamodb.delete_table(TableName="Mock_Preferences")
+        from dynamo import reset_dynamo_table
+        reset_dynamo_table()
         sys.path.remove(os.getcwd() + '/layers/python')
 
     def test_create_preference_success(self):
@@ -0,0 +1,79 @@
+import json
+from unittest import main, TestCase, mock
+import os
+import sys
+
+from moto import mock_dynamodb
+
+
+@mock.patch.dict(
+    os.environ, {'TABLE': 'Mock_Preferences',
+                 'REGION': 'ap-southeast-1',
+                 'AWSENV': 'MOCK'}
+)
+@mock_dynamodb
+class TestDynamo(TestCase):
+    def setUp(self) -> None:
+        sys.path.append(os.getcwd() + '/layers/python')
+
+    def tearDown(self) -> None:
+        from dynamo import reset_dynamo_table
+        reset_dynamo_table()
+        sys.path.remove(os.getcwd() + '/layers/python')
+
+    def test_get_dynamo_table_is_cached(self):
+        from dynamo import get_dynamo_table
+
+        table = get_dynamo_table()
+
+        self.assertIs(get_dynamo_table(), table)
+        self.assertEqual(table.name, 'Mock_Preferences')
+
+    def test_get_dynamo_table_keyed_by_environment(self):
+        from dynamo import get_dynamo_table
+
+        table = get_dynamo_table()
+        with mock.patch.dict(os.environ, {'TABLE': 'Other_Preferences'}):
+            other = get_dynamo_table()
+
+        self.assertIsNot(other, table)
+        self.assertEqual(other.name, 'Other_Preferences')
+
+    def test_reset_dynamo_table(self):
+        from dynamo import get_dynamo_table, reset_dynamo_table
+
+        table = get_dynamo_table()
+        reset_dynamo_table()
+
+        self.assertIsNot(get_dynamo_table(), table)
+
+    def test_to_json_converts_dynamo_types(self):
+        from decimal import Decimal
+        from dynamo import to_json
+
+        item = {
+            'user_id': Decimal('1'),
+            'max_price': Decimal('1500.50'),
+            'districts': {'D20', 'D19'},
+            'listing_type': 'Rent'
+        }
+
+        self.assertEqual(json.loads(to_json(item)), {
+            'user_id': 1,
+            'max_price': 1500.5,
+            'districts': ['D19', 'D20'],
+            'listing_type': 'Rent'
+        })
+
+    def test_to_json_without_orjson(self):
+        from decimal import Decimal
+        import dynamo
+
+        with mock.patch.object(dynamo, 'orjson', None):
+            body = dynamo.to_json([{'user_id': Decimal('2')}])
+
+        self.assertEqual(body, '[{"user_id": 2}]')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import json
+import sys
+from unittest import main, TestCase, mock
+import os
+
+import boto3
+from moto import mock_dynamodb
+
+
+@mock.patch.dict(
+    os.environ, {'TABLE': 'Mock_Preferences',
+                 'REGION': 'ap-southeast-1',
+                 'AWSENV': 'MOCK'}
+)
+@mock_dynamodb
+class TestListPreferences(TestCase):
+    def setUp(self) -> None:
+        sys.path.append(os.getcwd() + '/layers/python')
+        self.dynamodb = boto3.client('dynamodb', region_name='ap-southeast-1')
+        self.dynamodb.create_table(
+            TableName="Mock_Preferences",
+            KeySchema=[
+                {"AttributeName": "user_id", "KeyType": "HASH"}
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "N"}
+            ],
+            ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1}
+        )
+        for user_id in range(1, 6):
+            self.dynamodb.put_item(TableName='Mock_Preferences', Item={
+                "user_id": {"N": str(user_id)},
+                "listing_type": {"S": "Sale"},
+                "property_type": {"S": "HDB"},
+                "job_frequency_hours": {"N": "3" if user_id % 2 else "1"}
+            })
+
+    def tearDown(self) -> None:
+        self.dynamodb.delete_table(TableName='Mock_Preferences')
+        from dynamo import reset_dynamo_table
+        reset_dynamo_table()
+        sys.path.remove(os.getcwd() + '/layers/python')
+
+    def test_list_preferences_paginates(self):
+        from src.list_preferences import app
+
+        with open('tests/test_events/list_preferences.json', 'r') as f:
+            event = json.load(f)
+        del event['queryStringParameters']['job_frequency_hours']
+
+        user_ids = []
+        while True:
+            response = app.lambda_handler(event, '')
+            body = json.loads(response['body'])
+            self.assertEqual(response['statusCode'], 200)
+            self.assertLessEqual(len(body['items']), 2)
+            user_ids += [item['user_id'] for item in body['items']]
+            if not body['next_token']:
+                break
+            event['queryStringParameters']['next_token'] = body['next_token']
+
+        self.assertEqual(sorted(user_ids), [1, 2, 3, 4, 5])
+
+    def test_list_preferences_filters_and_projects(self):
+        from src.list_preferences import app
+
+        with open('tests/test_events/list_preferences.json', 'r') as f:
+            event = json.load(f)
+        event['queryStringParameters'].update(
+            limit='10', fields='user_id,job_frequency_hours'
+        )
+
+        response = app.lambda_handler(event, '')
+        body = json.loads(response['body'])
+
+        self.assertEqual(sorted(item['user_id'] for item in body['items']),
+                         [1, 3, 5])
+        for item in body['items']:
+            self.assertEqual(set(item), {'user_id', 'job_frequency_hours'})
+        self.assertIsNone(body['next_token'])
+
+    def test_scan_pages_follows_every_page(self):
+        from dynamo import scan_pages
+
+        user_ids = []
+        for page in scan_pages(2):
+            self.assertLessEqual(len(page), 2)
+            user_ids += [int(item['user_id']) for item in page]
+
+        self.assertEqual(sorted(user_ids), [1, 2, 3, 4, 5])
+
+    def test_scan_page_passes_segment(self):
+        from dynamo import get_dynamo_table, scan_page
+
+        table = get_dynamo_table()
+        with mock.patch.object(table, 'scan', return_value={'Items': []}) as scan:
+            scan_page(10, segment=1, total_segments=4)
+
+        self.assertEqual(scan.call_args.kwargs['Segment'], 1)
+        self.assertEqual(scan.call_args.kwargs['TotalSegments'], 4)
+
+    def test_list_preferences_failure(self):
+        from src.list_preferences import app
+
+        with open('tests/test_events/list_preferences.json', 'r') as f:
+            event = json.load(f)
+        event['queryStringParameters']['limit'] = 'all'
+
+        response = app.lambda_handler(event, '')
+
+        self.assertEqual(response['statusCode'], 400)
+        self.assertEqual(response['body'], 'Bad Request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import json
+import sys
+from unittest import main, TestCase, mock
+import os
+
+import boto3
+from moto import mock_dynamodb
+
+
+@mock.patch.dict(
+    os.environ, {'TABLE': 'Mock_Preferences',
+                 'REGION': 'ap-southeast-1',
+                 'AWSENV': 'MOCK'}
+)
+@mock_dynamodb
+class TestPreferenceRouter(TestCase):
+    def setUp(self) -> None:
+        sys.path.append(os.getcwd() + '/layers/python')
+        self.dynamodb = boto3.client('dynamodb', region_name='ap-southeast-1')
+        self.dynamodb.create_table(
+            TableName="Mock_Preferences",
+            KeySchema=[
+                {"AttributeName": "user_id", "KeyType": "HASH"}
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "N"}
+            ],
+            ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1}
+        )
+
+    def tearDown(self) -> None:
+        self.dynamodb.delete_table(TableName='Mock_Preferences')
+        from dynamo import reset_dynamo_table
+        reset_dynamo_table()
+        sys.path.remove(os.getcwd() + '/layers/python')
+
+    def test_router_create_then_read(self):
+        from src.preference_router import app
+
+        with open('tests/test_events/create_preference.json', 'r') as f:
+            create_event = json.load(f)
+        with open('tests/test_events/read_preference.json', 'r') as f:
+            read_event = json.load(f)
+        # catch-all routes do not provide the user_id path parameter
+        read_event['pathParameters'] = {'proxy': 'preferences/1'}
+
+        create_response = app.lambda_handler(create_event, '')
+        read_response = app.lambda_handler(read_event, '')
+
+        self.assertEqual(create_response['statusCode'], 201)
+        self.assertEqual(read_response['statusCode'], 200)
+        self.assertEqual(json.loads(read_response['body'])['listing_type'], 'Sale')
+
+    def test_router_delete_missing_preference(self):
+        from src.preference_router import app
+
+        with open('tests/test_events/delete_preference.json', 'r') as f:
+            event = json.load(f)
+
+        response = app.lambda_handler(event, '')
+
+        self.assertEqual(response['statusCode'], 400)
+
+    def test_router_unknown_route(self):
+        from src.preference_router import app
+
+        with open('tests/test_events/read_preference.json', 'r') as f:
+            event = json.load(f)
+        event['requestContext']['http']['method'] = 'PATCH'
+
+        response = app.lambda_handler(event, '')
+
+        self.assertEqual(response['statusCode'], 404)
+        self.assertEqual(response['body'], 'Not Found')
+
+    def test_match_path(self):
+        from src.preference_router.app import match_path
+
+        self.assertEqual(
+            match_path('/preferences/{user_id}', '/preferences/7'),
+            {'user_id': '7'}
+        )
+        self.assertIsNone(match_path('/preferences/{user_id}', '/preferences'))
+        self.assertEqual(match_path('/preferences', '/preferences'), {})
+
+
+if __name__ == '__main__':
+    main()
@@ -30,6 +30,8 @@ class TestReadPreference(TestCase):
 
     def tearDown(self) -> None:
         self.dynamodb.delete_table(TableName='Mock_Preferences')
+        from dynamo import reset_dynamo_table
+        reset_dynamo_table()
         sys.path.remove(os.getcwd() + '/layers/python')
 
     def test_read_preference_success(self):
@@ -63,7 +65,37 @@ class TestReadPreference(TestCase):
         body = json.loads(response['body'])
 
         for k, v in mock_item.items():
-            self.assertEqual(body[k], list(v.values())[0])
+            if 'N' in v:
+                self.assertEqual(body[k], int(v['N']))
+            else:
+                self.assertEqual(body[k], v['S'])
+
+    def test_read_preference_etag(self):
+        from src.read_preference import app
+
+        self.dynamodb.put_item(TableName='Mock_Preferences', Item={
+            "user_id": {"N": "1"},
+            "listing_type": {"S": "Sale"},
+            "version": {"S": "abc123"}
+        })
+
+        event_data = 'tests/test_events/read_preference.json'
+        with open(event_data, 'r') as f:
+            event = json.load(f)
+
+        response = app.lambda_handler(event, '')
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(response['headers']['ETag'], '"abc123"')
+        self.assertNotIn('version', json.loads(response['body']))
+
+        event['headers']['if-none-match'] = '"abc123"'
+        response = app.lambda_handler(event, '')
+        self.assertEqual(response['statusCode'], 304)
+        self.assertEqual(response['body'], '')
+
+        event['headers']['if-none-match'] = '"stale"'
+        response = app.lambda_handler(event, '')
+        self.assertEqual(response['statusCode'], 200)
 
     def test_read_preference_failure(self):
         from src.read_preference import app
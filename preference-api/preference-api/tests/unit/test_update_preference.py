@@ -30,6 +30,8 @@ class TestUpdatePreference(TestCase):
 
     def tearDown(self) -> None:
         self.dynamodb.delete_table(TableName='Mock_Preferences')
+        from dynamo import reset_dynamo_table
+        reset_dynamo_table()
         sys.path.remove(os.getcwd() + '/layers/python')
 
     def test_update_preference_success(self):
@@ -61,21 +63,112 @@ class TestUpdatePreference(TestCase):
         body = json.loads(response['body'])
 
         self.assertEqual(response['statusCode'], 200)
-        self.assertEqual(body['user_id'], '1')
+        self.assertNotIn('user_id', body)
         self.assertEqual(body['listing_type'], 'Rent')
         self.assertEqual(body['property_type'], 'Condo')
-        self.assertEqual(body['property_type_code'], '5 room')
-        self.assertEqual(body['min_price'], '700000')
-        self.assertEqual(body['max_price'], '800000')
-        self.assertEqual(body['min_floor_size'], '1000')
-        self.assertEqual(body['max_floor_size'], '1400')
-        self.assertEqual(body['min_build_year'], '2000')
-        self.assertEqual(body['max_build_year'], '2010')
+        self.assertEqual(body['min_build_year'], 2000)
         self.assertEqual(body['bedrooms'], '4')
-        self.assertEqual(body['floor_level'], 'High')
-        self.assertEqual(body['tenure'], '99-year')
         self.assertEqual(body['district'], 'D20')
-        self.assertEqual(body['job_frequency_hours'], '1')
+        self.assertEqual(body['job_frequency_hours'], 1)
+
+        item = self.dynamodb.get_item(
+            TableName='Mock_Preferences', Key={"user_id": {"N": "1"}}
+        )['Item']
+        self.assertEqual(item['property_type_code'], {"S": "5 room"})
+        self.assertEqual(item['min_price'], {"N": "700000"})
+        self.assertEqual(item['max_price'], {"N": "800000"})
+        self.assertEqual(item['min_floor_size'], {"N": "1000"})
+        self.assertEqual(item['max_floor_size'], {"N": "1400"})
+        self.assertEqual(item['max_build_year'], {"N": "2010"})
+        self.assertEqual(item['floor_level'], {"S": "High"})
+        self.assertEqual(item['tenure'], {"S": "99-year"})
+
+    def test_update_preference_partial(self):
+        from src.update_preference import app
+
+        self.dynamodb.put_item(TableName='Mock_Preferences', Item={
+            "user_id": {"N": "1"},
+            "listing_type": {"S": "Sale"},
+            "max_price": {"N": "800000"},
+            "district": {"S": "D19"}
+        })
+
+        event_data = 'tests/test_events/update_preference.json'
+        with open(event_data, 'r') as f:
+            event = json.load(f)
+        event['body'] = json.dumps({"max_price": 900000, "district": "D20"})
+
+        response = app.lambda_handler(event, '')
+        body = json.loads(response['body'])
+        item = self.dynamodb.get_item(
+            TableName='Mock_Preferences', Key={"user_id": {"N": "1"}}
+        )['Item']
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(body, {'max_price': 900000, 'district': 'D20'})
+        self.assertEqual(item['listing_type'], {"S": "Sale"})
+        self.assertEqual(item['max_price'], {"N": "900000"})
+
+    def test_update_preference_invalid_field(self):
+        from src.update_preference import app
+
+        self.dynamodb.put_item(TableName='Mock_Preferences', Item={
+            "user_id": {"N": "1"},
+            "max_price": {"N": "800000"}
+        })
+
+        event_data = 'tests/test_events/update_preference.json'
+        with open(event_data, 'r') as f:
+            event = json.load(f)
+
+        for changes in ({"colour": "red"}, {"max_price": "cheap"}, {}):
+            event['body'] = json.dumps(changes)
+            response = app.lambda_handler(event, '')
+
+            self.assertEqual(response['statusCode'], 400)
+            self.assertEqual(response['body'], 'Bad Request')
+
+    def test_update_preference_if_match(self):
+        from src.update_preference import app
+
+        self.dynamodb.put_item(TableName='Mock_Preferences', Item={
+            "user_id": {"N": "1"},
+            "max_price": {"N": "800000"},
+            "version": {"S": "abc123"}
+        })
+
+        event_data = 'tests/test_events/update_preference.json'
+        with open(event_data, 'r') as f:
+            event = json.load(f)
+        event['body'] = json.dumps({"max_price": 900000})
+
+        event['headers']['If-Match'] = '"stale"'
+        response = app.lambda_handler(event, '')
+        self.assertEqual(response['statusCode'], 412)
+
+        event['headers']['If-Match'] = '"abc123"'
+        response = app.lambda_handler(event, '')
+        self.assertEqual(response['statusCode'], 200)
+        self.assertNotEqual(response['headers']['ETag'], '"abc123"')
+        self.assertEqual(json.loads(response['body']), {'max_price': 900000})
+
+        # the version moved on, so the old ETag is now stale
+        response = app.lambda_handler(event, '')
+        self.assertEqual(response['statusCode'], 412)
+
+    def test_update_preference_if_match_missing(self):
+        from src.update_preference import app
+
+        event_data = 'tests/test_events/update_preference.json'
+        with open(event_data, 'r') as f:
+            event = json.load(f)
+        event['body'] = json.dumps({"max_price": 900000})
+        event['headers']['If-Match'] = '"abc123"'
+
+        response = app.lambda_handler(event, '')
+
+        self.assertEqual(response['statusCode'], 404)
+        self.assertEqual(response['body'], 'Not Found')
 
     def test_update_preference_failure(self):
         from src.update_preference import app
@@ -1,10 +1,8 @@
+import asyncio
 import logging
-import boto3
-import botocore
-import json
-import requests
 import os
 import sys
+from datetime import datetime
 from uuid import uuid4
 from typing import Dict
 from telegram import (
@@ -21,22 +19,29 @@ from telegram.ext import (
     CommandHandler,
     ConversationHandler,
     CallbackContext,
-    CallbackQueryHandler
+    CallbackQueryHandler,
+    PicklePersistence
 )
 from project_config import (
     handlers,
     preference_options,
     preference_data,
     numeric_cols,
-    display_order,
-    TIME_INTERVAL
+    display_order
 )
+from preference_client import PreferenceClient
+from result_consumer import ResultConsumer
+from scraper_invoker import ScraperInvoker
+from scheduler import ScrapeScheduler
+from schedule_store import get_schedule_store
 
 LAMBDA_FUNCTION = os.environ.get('LAMBDA_FUNCTION')
 API_URI = os.environ.get('API_URI')
 AWS_ACCESS_KEY = os.environ.get('AWS_ACCESS_KEY')
 AWS_SECRET_KEY = os.environ.get('AWS_SECRET_KEY')
 BOT_TOKEN = os.environ.get('BOT_TOKEN')
+PERSISTENCE_FILE = os.environ.get('PERSISTENCE_FILE')
+RESULT_QUEUE_URL = os.environ.get('RESULT_QUEUE_URL')
 mode = os.environ.get('MODE')
 
 logging.basicConfig(
@@ -64,9 +69,24 @@ else:
     sys.exit(1)
 
 
-preference_key_count = 0
-new_preference = None
-previous_updated_key = None
+preference_client = PreferenceClient(API_URI)
+scraper_invoker = ScraperInvoker(
+    function_name=LAMBDA_FUNCTION,
+    access_key=AWS_ACCESS_KEY,
+    secret_key=AWS_SECRET_KEY
+)
+scheduler = ScrapeScheduler(
+    scraper_invoker,
+    result_queue_url=RESULT_QUEUE_URL
+)
+result_consumer = None
+if RESULT_QUEUE_URL:
+    result_consumer = ResultConsumer(
+        queue_url=RESULT_QUEUE_URL,
+        access_key=AWS_ACCESS_KEY,
+        secret_key=AWS_SECRET_KEY
+    )
+schedule_store = get_schedule_store(AWS_ACCESS_KEY, AWS_SECRET_KEY)
 GET_NEW_PREFERENCE, GET_NUMERIC_INPUT = range(2)
 UPDATE_CURRENT_PREFERENCE, CHOOSE_OPTION_TO_UPDATE, UPDATE_NUMERIC_SELECTION = range(2, 5)
 DELETE_PREFERENCE = 5
@@ -122,17 +142,14 @@ async def create_preference(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text='No existing preference, would you like to create a new preference?',
         reply_markup=InlineKeyboardMarkup(buttons)
     )
-    global new_preference
-    new_preference = preference_data.copy()
-    new_preference['user_id'] = update.message.from_user.id
+    clear_conversation_state(context)
+    context.user_data['new_preference'] = preference_data.copy()
+    context.user_data['new_preference']['user_id'] = update.message.from_user.id
     return GET_NEW_PREFERENCE
 
 
 async def get_existing_preference(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    r = requests.get(f'{API_URI}/{update.message.from_user.id}')
-    if r.status_code == 404:
-        return
-    return r.json()
+    return await preference_client.get(update.message.from_user.id)
 
 
 async def read_preference(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -181,8 +198,10 @@ async def delete_preference_actual(update: Update, context: CallbackContext):
             text='Ending current operation...'
         )
         return ConversationHandler.END
-    r = requests.delete(f'{API_URI}/{update.callback_query.from_user.id}')
-    if r.status_code == 400:
+    delete_success = await preference_client.delete(
+        update.callback_query.from_user.id
+    )
+    if not delete_success:
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text='Deletion failed...'
@@ -195,7 +214,8 @@ async def delete_preference_actual(update: Update, context: CallbackContext):
     return ConversationHandler.END
 
 async def get_new_preference(update: Update, context: CallbackContext):
-    global preference_key_count, new_preference
+    new_preference = context.user_data['new_preference']
+    preference_key_count = context.user_data.get('preference_key_count', 0)
     last_key = list(preference_options.keys())[preference_key_count - 1]
     if not preference_options[last_key]:
         query = update.message.text
@@ -203,6 +223,7 @@ async def get_new_preference(update: Update, context: CallbackContext):
         query = update.callback_query.data
         await update.callback_query.answer()
     if query == 'No':
+        clear_conversation_state(context)
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text='Ending current operation...'
@@ -231,7 +252,7 @@ async def get_new_preference(update: Update, context: CallbackContext):
         else:
             new_preference[last_key] = query
         if preference_key_count == len(preference_options.keys()):
-            preference_key_count = 0
+            clear_conversation_state(context)
             create_success = await post_preference(new_preference)
             if not create_success:
                 text = 'Error saving preference...'
@@ -241,14 +262,13 @@ async def get_new_preference(update: Update, context: CallbackContext):
                     key = ' '.join(col.split('_'))
                     text += f"{key}: {new_preference.get(col, '')}\n"
                 text += '\nType /schedule_scraper to run your scraper'
-            new_preference = preference_data.copy()
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
                 text=text
             )
             return ConversationHandler.END
     category = list(preference_options.keys())[preference_key_count]
-    preference_key_count += 1
+    context.user_data['preference_key_count'] = preference_key_count + 1
     text = 'Choose - ' + ' '.join(category.split('_')).lower() + '\n'
     text += 'Type /cancel to stop current operation\n\n'
     if category == 'property_type_code':
@@ -293,19 +313,16 @@ async def schedule_scraper(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     chat_id = update.effective_message.chat_id
-    jobs_removed = remove_job_if_exists(str(chat_id), context)
-    context.job_queue.run_repeating(
-        callback=invoke_scraper,
-        interval=TIME_INTERVAL*frequency,
-        data=json.dumps(preference),
-        chat_id=update.effective_message.chat_id,
-        first=0,
-        name=str(chat_id)
-    )
+    jobs_removed = scheduler.remove(chat_id, context.job_queue)
+    job = scheduler.add(chat_id, preference, context.job_queue)
+    await save_schedule(chat_id, preference)
+    wait = job.next_t - datetime.now(job.next_t.tzinfo)
+    minutes = max(1, round(wait.total_seconds() / 60))
     text = ''
     if jobs_removed:
         text += 'Cleared job queue...\n\n'
     text += f'Scraping scheduled for every {frequency} hour(s) for the above preferences\n' + \
+        f'First scrape in about {minutes} minute(s)\n' + \
         'Type /stop_scraper to stop the scraping process at any time'
     await context.bot.send_message(
         chat_id=update.message.chat_id,
@@ -313,18 +330,10 @@ async def schedule_scraper(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-def remove_job_if_exists(name: str, context: ContextTypes.DEFAULT_TYPE) -> bool:
-    """Remove job with given name. Returns whether job was removed."""
-    current_jobs = context.job_queue.get_jobs_by_name(name)
-    if not current_jobs:
-        return False
-    for job in current_jobs:
-        job.schedule_removal()
-    return True
-
-
 async def stop_scraper(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    jobs_removed = remove_job_if_exists(str(update.effective_message.chat_id), context)
+    chat_id = update.effective_message.chat_id
+    jobs_removed = scheduler.remove(chat_id, context.job_queue)
+    await delete_schedule(chat_id)
     if jobs_removed:
         text = 'Pending job removed successfully, scraping stopped...'
     else:
@@ -335,54 +344,45 @@ async def stop_scraper(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def invoke_scraper(context: CallbackContext):
-    config = botocore.config.Config(
-        read_timeout=900,
-        connect_timeout=900,
-        retries={"max_attempts": 0}
-    )
-    session = boto3.Session()
-    lambda_client = session.client(
-        service_name='lambda',
-        region_name='ap-southeast-1',
-        config=config,
-        aws_access_key_id=AWS_ACCESS_KEY,
-        aws_secret_access_key=AWS_SECRET_KEY
-    )
-    invoke_response = lambda_client.invoke(
-        FunctionName=LAMBDA_FUNCTION,
-        InvocationType='RequestResponse',
-        Payload=context.job.data
-    )
-    response = json.loads(invoke_response['Payload'].read())
-    if response['statusCode'] == 500:
-        text = 'An error occurred when running scraper...'
-    else:
-        links = json.loads(response['body'])
-        if not links:
-            text = 'No new listings found\n'
-        else:
-            text = 'New listings found!\n'
-            for link in links:
-                text += f'\n{link[0]}\n{link[1]}\n'
-    await context.bot.send_message(
-        chat_id=context.job.chat_id,
-        text=text
-    )
+async def save_schedule(chat_id: int, preference: Dict):
+    if not schedule_store:
+        return
+    try:
+        await asyncio.to_thread(schedule_store.save, chat_id, preference)
+    except Exception as e:
+        logging.error(f'Could not save schedule for {chat_id}: {e}')
+
+
+async def delete_schedule(chat_id: int):
+    if not schedule_store:
+        return
+    try:
+        await asyncio.to_thread(schedule_store.delete, chat_id)
+    except Exception as e:
+        logging.error(f'Could not delete schedule for {chat_id}: {e}')
+
+
+async def restore_schedules(application):
+    if not schedule_store:
+        return
+    try:
+        schedules = await asyncio.to_thread(schedule_store.load_all)
+    except Exception as e:
+        logging.error(f'Could not load schedules: {e}')
+        return
+    # buckets start at staggered offsets, so restored chats are spread
+    # across each interval rather than all scraping at startup
+    for chat_id, preference in schedules.items():
+        scheduler.add(chat_id, preference, application.job_queue)
+    logging.info(f'Restored {len(schedules)} schedules')
 
 
 async def post_preference(new_preference: Dict) -> bool:
-    r = requests.post(API_URI, json=new_preference)
-    if r.status_code in [400, 500]:
-        return False
-    return True
+    return await preference_client.create(new_preference)
 
 
 async def put_preference(payload: Dict) -> bool:
-    r = requests.put(f"{API_URI}/{payload['user_id']}", json=payload)
-    if r.status_code == 400:
-        return False
-    return True
+    return await preference_client.update(payload)
 
 
 async def update_preference(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -400,13 +400,15 @@ async def update_preference(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text='Would you like to update your preferences?',
         reply_markup=InlineKeyboardMarkup(buttons)
     )
-    global new_preference
-    new_preference = preference.copy()
+    clear_conversation_state(context)
+    context.user_data['current_preference'] = preference
+    context.user_data['new_preference'] = preference.copy()
     return UPDATE_CURRENT_PREFERENCE
 
 
 async def update_current_preference(update: Update, context: CallbackContext):
-    global previous_updated_key, new_preference
+    new_preference = context.user_data['new_preference']
+    previous_updated_key = context.user_data.get('previous_updated_key')
     if previous_updated_key and not preference_options[previous_updated_key]:
         query = update.message.text
     else:
@@ -414,6 +416,7 @@ async def update_current_preference(update: Update, context: CallbackContext):
         await update.callback_query.answer()
     if not previous_updated_key:
         if query == 'No':
+            clear_conversation_state(context)
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
                 text='Ending current operation...'
@@ -472,22 +475,27 @@ async def update_current_preference(update: Update, context: CallbackContext):
 
 
 async def choose_option_to_update(update: Update, context: CallbackContext):
-    global previous_updated_key, new_preference
+    new_preference = context.user_data['new_preference']
     query = update.callback_query.data
     await update.callback_query.answer()
     if query == 'Cancel':
-        new_preference = preference_data.copy()
-        previous_updated_key = None
+        clear_conversation_state(context)
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text='Ending current operation...'
         )
         return ConversationHandler.END
     if query == 'Submit':
-        # update preference
-        for col in numeric_cols:
-            new_preference[col] = int(new_preference[col])
-        update_success = await put_preference(new_preference)
+        # update preference, only send what was edited, the API leaves the rest untouched
+        current_preference = context.user_data['current_preference']
+        payload = {
+            key: value for key, value in new_preference.items()
+            if value != current_preference.get(key)
+        }
+        update_success = True
+        if payload:
+            payload['user_id'] = new_preference['user_id']
+            update_success = await put_preference(payload)
         if not update_success:
             text = 'Error updating preferences...'
         else:
@@ -496,14 +504,13 @@ async def choose_option_to_update(update: Update, context: CallbackContext):
                 key = ' '.join(col.split('_'))
                 text += f"{key}: {new_preference.get(col, '')}\n"
             text += '\nType /schedule_scraper to run your scraper'
-        new_preference = preference_data.copy()
-        previous_updated_key = None
+        clear_conversation_state(context)
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text=text
         )
         return ConversationHandler.END
-    previous_updated_key = query
+    context.user_data['previous_updated_key'] = query
     category = ' '.join(query.split('_'))
     text = 'Choose - ' + category + '\n'
     text += 'Type /cancel to stop current operation\n\n'
@@ -535,23 +542,54 @@ async def choose_option_to_update(update: Update, context: CallbackContext):
     return UPDATE_CURRENT_PREFERENCE
 
 
+def clear_conversation_state(context: CallbackContext) -> None:
+    for key in ('new_preference', 'current_preference',
+                'preference_key_count', 'previous_updated_key'):
+        context.user_data.pop(key, None)
+
+
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    global new_preference, preference_key_count, previous_updated_key
-    new_preference = None
-    previous_updated_key = None
-    preference_key_count = 0
+    clear_conversation_state(context)
     await update.message.reply_text('Operation cancelled...')
     return ConversationHandler.END
 
 
+async def post_init(application):
+    await restore_schedules(application)
+    if result_consumer:
+        # each page of results is sent as soon as the scraper queues it
+        result_consumer.start(
+            lambda message: scheduler.deliver(application.bot, message)
+        )
+
+
+async def shutdown(application):
+    if result_consumer:
+        await result_consumer.stop()
+    await preference_client.close()
+    scraper_invoker.close()
+
+
 if __name__ == '__main__':
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
-    start_handler = CommandHandler('start', start)
-    help_handler = CommandHandler('help', help)
-    scraper_handler = CommandHandler('schedule_scraper', schedule_scraper)
-    stop_scraper_handler = CommandHandler('stop_scraper', stop_scraper)
-    read_handler = CommandHandler('read', read_preference)
-    unknown_handler = MessageHandler(filters.COMMAND, unknown)
+    builder = ApplicationBuilder() \
+        .token(BOT_TOKEN) \
+        .post_init(post_init) \
+        .post_shutdown(shutdown)
+    persistent = bool(PERSISTENCE_FILE)
+    if persistent:
+        builder = builder.persistence(PicklePersistence(filepath=PERSISTENCE_FILE))
+    application = builder.build()
+    # updates are still processed one at a time, but callbacks run as
+    # tasks so a slow API call only holds up its own conversation, which
+    # ConversationHandler keeps in order while its callback is pending
+    start_handler = CommandHandler('start', start, block=False)
+    help_handler = CommandHandler('help', help, block=False)
+    scraper_handler = CommandHandler(
+        'schedule_scraper', schedule_scraper, block=False
+    )
+    stop_scraper_handler = CommandHandler('stop_scraper', stop_scraper, block=False)
+    read_handler = CommandHandler('read', read_preference, block=False)
+    unknown_handler = MessageHandler(filters.COMMAND, unknown, block=False)
     delete_handler = ConversationHandler(
         entry_points=[CommandHandler('delete', delete_preference)],
         states={
@@ -560,7 +598,10 @@ if __name__ == '__main__':
                 CallbackQueryHandler(callback=delete_preference_actual)
             ]
         },
-        fallbacks=[CommandHandler('cancel', cancel)]
+        fallbacks=[CommandHandler('cancel', cancel)],
+        name='delete',
+        persistent=persistent,
+        block=False
     )
     create_handler = ConversationHandler(
         entry_points=[CommandHandler('create', create_preference)],
@@ -577,7 +618,10 @@ if __name__ == '__main__':
                 )
             ]
         },
-        fallbacks=[CommandHandler('cancel', cancel)]
+        fallbacks=[CommandHandler('cancel', cancel)],
+        name='create',
+        persistent=persistent,
+        block=False
     )
     update_handler = ConversationHandler(
         entry_points=[CommandHandler('update', update_preference)],
@@ -598,7 +642,10 @@ if __name__ == '__main__':
                 )
             ]
         },
-        fallbacks=[CommandHandler('cancel', cancel)]
+        fallbacks=[CommandHandler('cancel', cancel)],
+        name='update',
+        persistent=persistent,
+        block=False
     )
     application.add_handler(start_handler)
     application.add_handler(help_handler)
@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from project_config import (
+    PREFERENCE_CACHE_SIZE,
+    PREFERENCE_CACHE_TTL
+)
+
+
+class CacheEntry:
+    __slots__ = ('preference', 'etag', 'expires_at')
+
+    def __init__(self, preference: Dict, etag: Optional[str], expires_at: float):
+        self.preference = preference
+        self.etag = etag
+        self.expires_at = expires_at
+
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.monotonic()
+
+
+class PreferenceCache:
+    """LRU of user_id -> preference with a TTL.
+
+    Expired entries are kept until evicted so their ETag can be used to
+    revalidate them with a conditional read instead of a full one. Only
+    touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int = PREFERENCE_CACHE_SIZE,
+                 ttl: float = PREFERENCE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: 'OrderedDict[int, CacheEntry]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def get(self, user_id: int) -> Optional[CacheEntry]:
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            self.entries.move_to_end(user_id)
+        return entry
+
+    def set(self, user_id: int, preference: Dict, etag: Optional[str]) -> None:
+        self.entries[user_id] = CacheEntry(
+            preference,
+            etag,
+            time.monotonic() + self.ttl
+        )
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def touch(self, user_id: int) -> None:
+        """Mark a revalidated entry fresh for another TTL"""
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            entry.expires_at = time.monotonic() + self.ttl
+
+    def delete(self, user_id: int) -> None:
+        self.entries.pop(user_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'size': len(self.entries)
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import httpx
+from typing import Dict, Optional
+from preference_cache import PreferenceCache
+from project_config import (
+    API_BACKOFF,
+    API_MAX_CONNECTIONS,
+    API_RETRIES,
+    API_TIMEOUT
+)
+
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
+
+
+class PreferenceClient:
+    """Async client for the preference API sharing one connection pool
+    across every conversation, so a slow call only waits on itself"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.cache = PreferenceCache()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=API_MAX_CONNECTIONS,
+                max_keepalive_connections=API_MAX_CONNECTIONS
+            )
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(API_TIMEOUT),
+                transport=httpx.AsyncHTTPTransport(
+                    limits=limits,
+                    retries=API_RETRIES
+                )
+            )
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        # the transport only retries failed connects, timeouts on
+        # idempotent calls are retried here with exponential backoff
+        for attempt in range(API_RETRIES + 1):
+            try:
+                return await self.client.request(method, url, **kwargs)
+            except httpx.TimeoutException:
+                if method not in IDEMPOTENT_METHODS or attempt == API_RETRIES:
+                    raise
+                await asyncio.sleep(API_BACKOFF * 2 ** attempt)
+
+    async def get(self, user_id: int) -> Optional[Dict]:
+        entry = self.cache.get(user_id)
+        if entry is not None and entry.is_fresh():
+            self.cache.hits += 1
+            return dict(entry.preference)
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        r = await self.request('GET', f'{self.base_url}/{user_id}', headers=headers)
+        if r.status_code == 304:
+            self.cache.revalidations += 1
+            self.cache.touch(user_id)
+            return dict(entry.preference)
+        self.cache.misses += 1
+        if r.status_code == 404:
+            self.cache.delete(user_id)
+            return
+        preference = r.json()
+        if r.status_code == 200:
+            self.cache.set(user_id, preference, r.headers.get('ETag'))
+        return dict(preference)
+
+    async def create(self, preference: Dict) -> bool:
+        r = await self.request('POST', self.base_url, json=preference)
+        if r.status_code in [400, 500]:
+            return False
+        if r.status_code == 201:
+            self.cache.set(preference['user_id'], r.json(), r.headers.get('ETag'))
+        return True
+
+    async def update(self, preference: Dict) -> bool:
+        user_id = preference['user_id']
+        entry = self.cache.get(user_id)
+        headers = {}
+        if entry is not None and entry.etag:
+            # the edit was made against the cached copy, so refuse it if
+            # the preference has changed since
+            headers['If-Match'] = entry.etag
+        r = await self.request(
+            'PUT',
+            f'{self.base_url}/{user_id}',
+            json=preference,
+            headers=headers
+        )
+        if r.status_code in [400, 404, 412]:
+            self.cache.delete(user_id)
+            return False
+        if entry is not None and r.status_code == 200:
+            self.cache.set(
+                user_id,
+                {**entry.preference, **preference},
+                r.headers.get('ETag')
+            )
+        else:
+            self.cache.delete(user_id)
+        return True
+
+    async def delete(self, user_id: int) -> bool:
+        r = await self.request('DELETE', f'{self.base_url}/{user_id}')
+        self.cache.delete(user_id)
+        if r.status_code == 400:
+            return False
+        return True
+
+    async def close(self) -> None:
+        logging.info(f'Preference cache stats: {self.cache.get_stats()}')
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,4 +1,27 @@
 TIME_INTERVAL = 3600
+API_TIMEOUT = 10
+API_RETRIES = 2
+API_BACKOFF = 0.5
+API_MAX_CONNECTIONS = 20
+SCRAPER_REGION = 'ap-southeast-1'
+SCRAPER_TIMEOUT = 900
+SCRAPER_CONCURRENCY = 10
+SCHEDULER_SLOTS = 4
+SCHEDULER_BATCH_SIZE = 25
+SCHEDULER_JITTER = 60
+SCHEDULER_RATE_LIMIT = 30
+# 'dynamodb' in deployment, backed by the Schedules table in the
+# preference-api template, 'file' for local runs
+SCHEDULE_STORE = 'none'
+SCHEDULE_TABLE = 'Schedules'
+SCHEDULE_REGION = 'ap-southeast-1'
+SCHEDULE_FILE = 'schedules.json'
+PREFERENCE_CACHE_SIZE = 1000
+PREFERENCE_CACHE_TTL = 300
+RESULT_QUEUE_WAIT = 20
+RESULT_QUEUE_BATCH = 10
+RESULT_QUEUE_MAX_RECEIVES = 5
+MESSAGE_LIMIT = 4096
 
 handlers = {
     '/help': 'view list of commands to run',
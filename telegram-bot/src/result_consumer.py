@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+import boto3
+from typing import Awaitable, Callable, Dict, List, Optional
+from project_config import (
+    RESULT_QUEUE_BATCH,
+    RESULT_QUEUE_MAX_RECEIVES,
+    RESULT_QUEUE_WAIT,
+    SCRAPER_REGION
+)
+
+Handler = Callable[[Dict], Awaitable[None]]
+
+
+class ResultConsumer:
+    """Long polls the queue the scraper streams page results to and hands
+    each message to a handler as it arrives"""
+
+    def __init__(self, queue_url: str,
+                 access_key: Optional[str],
+                 secret_key: Optional[str]):
+        self.queue_url = queue_url
+        self.sqs = boto3.client(
+            'sqs',
+            region_name=SCRAPER_REGION,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+        self.task: Optional[asyncio.Task] = None
+
+    def receive(self) -> List[Dict]:
+        response = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=RESULT_QUEUE_BATCH,
+            WaitTimeSeconds=RESULT_QUEUE_WAIT,
+            AttributeNames=['ApproximateReceiveCount']
+        )
+        return response.get('Messages', [])
+
+    def delete(self, messages: List[Dict]) -> None:
+        self.sqs.delete_message_batch(
+            QueueUrl=self.queue_url,
+            Entries=[
+                {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']}
+                for i, message in enumerate(messages)
+            ]
+        )
+
+    async def poll(self, handler: Handler) -> None:
+        while True:
+            try:
+                messages = await asyncio.to_thread(self.receive)
+            except Exception as e:
+                logging.error(f'Could not receive results: {e}')
+                await asyncio.sleep(RESULT_QUEUE_WAIT)
+                continue
+            handled = await self.handle(messages, handler)
+            if handled:
+                try:
+                    await asyncio.to_thread(self.delete, handled)
+                except Exception as e:
+                    logging.error(f'Could not delete results: {e}')
+
+    async def handle(self, messages: List[Dict],
+                     handler: Handler) -> List[Dict]:
+        """Hand each message to the handler and return those that are
+        done with and can be deleted"""
+        handled = []
+        for message in messages:
+            try:
+                await handler(json.loads(message['Body']))
+                handled.append(message)
+            except Exception as e:
+                receives = int(
+                    message.get('Attributes', {}).get('ApproximateReceiveCount', 1)
+                )
+                if receives >= RESULT_QUEUE_MAX_RECEIVES:
+                    logging.error(
+                        f'Dropping result after {receives} attempts: {e}'
+                    )
+                    handled.append(message)
+                else:
+                    # left on the queue, it is retried once it becomes
+                    # visible again
+                    logging.error(f'Could not deliver result: {e}')
+        return handled
+
+    def start(self, handler: Handler) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.poll(handler))
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+from typing import Dict
+from project_config import (
+    SCHEDULE_FILE,
+    SCHEDULE_REGION,
+    SCHEDULE_STORE,
+    SCHEDULE_TABLE
+)
+
+
+class FileScheduleStore:
+    """JSON file of chat_id -> preference, for local runs and tests"""
+
+    def __init__(self, path: str = SCHEDULE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write(self, schedules: Dict[str, Dict]) -> None:
+        with open(f'{self.path}.tmp', 'w') as f:
+            json.dump(schedules, f)
+        os.replace(f'{self.path}.tmp', self.path)
+
+    def load_all(self) -> Dict[int, Dict]:
+        with self.lock:
+            return {int(chat_id): pref for chat_id, pref in self.read().items()}
+
+    def save(self, chat_id: int, preference: Dict) -> None:
+        with self.lock:
+            schedules = self.read()
+            schedules[str(chat_id)] = preference
+            self.write(schedules)
+
+    def delete(self, chat_id: int) -> None:
+        with self.lock:
+            schedules = self.read()
+            if schedules.pop(str(chat_id), None) is not None:
+                self.write(schedules)
+
+
+class DynamoScheduleStore:
+    """Table keyed by chat_id (N), holding the scheduled preference as a
+    JSON string so it is restored exactly as it was scheduled"""
+
+    def __init__(self, table_name: str = SCHEDULE_TABLE,
+                 access_key: str = None,
+                 secret_key: str = None):
+        import boto3
+
+        self.table = boto3.resource(
+            'dynamodb',
+            region_name=SCHEDULE_REGION,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        ).Table(table_name)
+
+    def load_all(self) -> Dict[int, Dict]:
+        schedules = {}
+        kwargs = {}
+        while True:
+            response = self.table.scan(**kwargs)
+            for item in response['Items']:
+                schedules[int(item['chat_id'])] = json.loads(item['preference'])
+            if 'LastEvaluatedKey' not in response:
+                return schedules
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def save(self, chat_id: int, preference: Dict) -> None:
+        self.table.put_item(Item={
+            'chat_id': chat_id,
+            'preference': json.dumps(preference)
+        })
+
+    def delete(self, chat_id: int) -> None:
+        self.table.delete_item(Key={'chat_id': chat_id})
+
+
+def get_schedule_store(access_key: str = None, secret_key: str = None):
+    """Return the store selected by SCHEDULE_STORE, or None if disabled"""
+    name = os.environ.get('SCHEDULE_STORE', SCHEDULE_STORE)
+    if name == 'dynamodb':
+        return DynamoScheduleStore(access_key=access_key, secret_key=secret_key)
+    if name == 'file':
+        return FileScheduleStore(os.environ.get('SCHEDULE_FILE', SCHEDULE_FILE))
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import random
+from aiolimiter import AsyncLimiter
+from telegram.error import BadRequest, Forbidden
+from telegram.ext import CallbackContext, Job, JobQueue
+from typing import Dict, List, Optional, Tuple
+from project_config import (
+    MESSAGE_LIMIT,
+    SCHEDULER_BATCH_SIZE,
+    SCHEDULER_JITTER,
+    SCHEDULER_RATE_LIMIT,
+    SCHEDULER_SLOTS,
+    TIME_INTERVAL
+)
+from scraper_invoker import ScraperInvoker
+
+Bucket = Tuple[int, int]
+
+
+def format_listing(link: List) -> str:
+    """Listings arrive as [title, url, listing_id, price, floor_size,
+    bedrooms, build_year, recency], fields the scraper could not read
+    are null"""
+    title, url = link[:2]
+    price, floor_size, bedrooms, build_year, recency = \
+        (link[3:8] + [None] * 5)[:5]
+    details = []
+    if price is not None:
+        details.append(f'S${price:,}')
+    if floor_size is not None:
+        details.append(f'{floor_size:,} sqft')
+    if bedrooms is not None:
+        details.append(f'{bedrooms} bed')
+    if build_year is not None:
+        details.append(f'built {build_year}')
+    if recency:
+        details.append(f'listed {recency} ago')
+    text = f'\n{title}\n'
+    if details:
+        text += ' | '.join(details) + '\n'
+    return text + f'{url}\n'
+
+
+def format_links(result: Dict) -> List[str]:
+    """Result as messages under Telegram's length limit, split between
+    listings"""
+    if result['statusCode'] == 500:
+        return ['An error occurred when running scraper...']
+    links = result['links']
+    if not links:
+        return ['No new listings found\n']
+    messages = ['New listings found!\n']
+    for link in links:
+        text = format_listing(link)[:MESSAGE_LIMIT]
+        if len(messages[-1]) + len(text) > MESSAGE_LIMIT:
+            messages.append(text)
+        else:
+            messages[-1] += text
+    return messages
+
+
+class ScrapeScheduler:
+    """Coalesces scheduled chats into buckets instead of one job per chat.
+
+    Each frequency is split into SCHEDULER_SLOTS buckets spread evenly
+    across its interval. A chat joins the least loaded bucket for its
+    frequency, and every bucket runs as a single repeating job that sends
+    its preferences to the scraper in batches, throttled by a global
+    rate limit.
+    """
+
+    def __init__(self, invoker: ScraperInvoker,
+                 slots: int = SCHEDULER_SLOTS,
+                 batch_size: int = SCHEDULER_BATCH_SIZE,
+                 result_queue_url: Optional[str] = None):
+        self.invoker = invoker
+        self.slots = slots
+        self.batch_size = batch_size
+        # when set, the queue is named in every batch so the scraper
+        # streams to it, the scraper is not waited on and results arrive
+        # page by page through deliver
+        self.result_queue_url = result_queue_url
+        self.limiter = AsyncLimiter(SCHEDULER_RATE_LIMIT, 60)
+        self.buckets: Dict[Bucket, Dict[int, Dict]] = {}
+        self.chat_buckets: Dict[int, Bucket] = {}
+        self.user_chats: Dict[str, int] = {}
+
+    def get_job_name(self, bucket: Bucket) -> str:
+        return 'scrape-{}h-{}'.format(*bucket)
+
+    def choose_bucket(self, frequency: int) -> Bucket:
+        return min(
+            ((frequency, slot) for slot in range(self.slots)),
+            key=lambda bucket: len(self.buckets.get(bucket, {}))
+        )
+
+    def add(self, chat_id: int,
+            preference: Dict,
+            job_queue: JobQueue) -> Job:
+        self.remove(chat_id, job_queue)
+        frequency = int(preference['job_frequency_hours'])
+        bucket = self.choose_bucket(frequency)
+        self.buckets.setdefault(bucket, {})[chat_id] = preference
+        self.chat_buckets[chat_id] = bucket
+        self.user_chats[str(preference['user_id'])] = chat_id
+        jobs = job_queue.get_jobs_by_name(self.get_job_name(bucket))
+        if jobs:
+            return jobs[0]
+        interval = TIME_INTERVAL * frequency
+        first = interval * bucket[1] / self.slots + \
+            random.uniform(0, SCHEDULER_JITTER)
+        return job_queue.run_repeating(
+            callback=self.run_bucket,
+            interval=interval,
+            first=first,
+            data=bucket,
+            name=self.get_job_name(bucket)
+        )
+
+    def remove(self, chat_id: int, job_queue: JobQueue) -> bool:
+        """Remove a chat from its bucket. Returns whether it was scheduled."""
+        bucket = self.chat_buckets.pop(chat_id, None)
+        if bucket is None:
+            return False
+        chats = self.buckets[bucket]
+        preference = chats.pop(chat_id, None)
+        if preference is not None:
+            self.user_chats.pop(str(preference['user_id']), None)
+        if not chats:
+            del self.buckets[bucket]
+            for job in job_queue.get_jobs_by_name(self.get_job_name(bucket)):
+                job.schedule_removal()
+        return True
+
+    def get_batches(self, bucket: Bucket) -> List[List[Tuple[int, Dict]]]:
+        chats = list(self.buckets.get(bucket, {}).items())
+        return [
+            chats[i:i + self.batch_size]
+            for i in range(0, len(chats), self.batch_size)
+        ]
+
+    async def run_bucket(self, context: CallbackContext) -> None:
+        # the invoker's semaphore and the rate limiter bound concurrency
+        await asyncio.gather(*(
+            self.run_batch(context, batch)
+            for batch in self.get_batches(context.job.data)
+        ))
+
+    async def run_batch(self, context: CallbackContext,
+                        batch: List[Tuple[int, Dict]]) -> None:
+        chats = {str(preference['user_id']): chat_id for chat_id, preference in batch}
+        event = {'preferences': [preference for _, preference in batch]}
+        if self.result_queue_url:
+            event['result_queue_url'] = self.result_queue_url
+        payload = json.dumps(event)
+        async with self.limiter:
+            try:
+                response = await self.invoker.invoke(
+                    payload,
+                    wait=not self.result_queue_url
+                )
+            except Exception as e:
+                logging.error(f'Scraper invoke failed: {e}')
+                response = {'statusCode': 500}
+        if response['statusCode'] == 202:
+            return
+        if response['statusCode'] == 500:
+            results = [
+                {'user_id': user_id, 'statusCode': 500, 'links': []}
+                for user_id in chats
+            ]
+        else:
+            results = json.loads(response['body'])
+        for result in results:
+            chat_id = chats.get(str(result['user_id']))
+            if chat_id is None:
+                continue
+            try:
+                for text in format_links(result):
+                    await context.bot.send_message(chat_id=chat_id, text=text)
+            except Exception as e:
+                # one chat failing, e.g. a user who blocked the bot, must
+                # not cost the rest of the batch their results
+                logging.error(f'Could not send results to chat {chat_id}: {e}')
+
+    async def deliver(self, bot, message: Dict) -> None:
+        """Send one streamed result. Pages with listings are sent as they
+        arrive, and the final message only speaks up when nothing else
+        was sent or the scrape failed."""
+        chat_id = self.user_chats.get(str(message['user_id']))
+        if chat_id is None:
+            return
+        if message['final'] and message['statusCode'] != 500 and message['total']:
+            return
+        if not message['final'] and not message['links']:
+            return
+        try:
+            for text in format_links(message):
+                await bot.send_message(chat_id=chat_id, text=text)
+        except (BadRequest, Forbidden) as e:
+            # retrying cannot fix a blocked bot or a rejected message, so
+            # the result counts as delivered instead of coming back from
+            # the queue forever; other errors still leave it to be retried
+            logging.error(f'Dropping results for chat {chat_id}: {e}')
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import boto3
+import botocore
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from project_config import (
+    SCRAPER_CONCURRENCY,
+    SCRAPER_REGION,
+    SCRAPER_TIMEOUT
+)
+
+
+class ScraperInvoker:
+    """Long-lived Lambda client whose blocking invokes run on a bounded
+    thread pool, keeping the event loop free while scrapes are running"""
+
+    def __init__(self, function_name: str,
+                 access_key: Optional[str],
+                 secret_key: Optional[str],
+                 concurrency: int = SCRAPER_CONCURRENCY):
+        self.function_name = function_name
+        config = botocore.config.Config(
+            read_timeout=SCRAPER_TIMEOUT,
+            connect_timeout=SCRAPER_TIMEOUT,
+            retries={"max_attempts": 0},
+            max_pool_connections=concurrency
+        )
+        self.lambda_client = boto3.Session().client(
+            service_name='lambda',
+            region_name=SCRAPER_REGION,
+            config=config,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix='scraper'
+        )
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def invoke_sync(self, payload: str, wait: bool = True) -> Dict:
+        if not wait:
+            # results are streamed back through the result queue instead
+            self.lambda_client.invoke(
+                FunctionName=self.function_name,
+                InvocationType='Event',
+                Payload=payload
+            )
+            return {'statusCode': 202}
+        invoke_response = self.lambda_client.invoke(
+            FunctionName=self.function_name,
+            InvocationType='RequestResponse',
+            Payload=payload
+        )
+        return json.loads(invoke_response['Payload'].read())
+
+    async def invoke(self, payload: str, wait: bool = True) -> Dict:
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                self.invoke_sync,
+                payload,
+                wait
+            )
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
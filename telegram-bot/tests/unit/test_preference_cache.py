@@ -0,0 +1,52 @@
+import os
+import sys
+from unittest import main, TestCase, mock
+
+# the bot runs from src/ and imports its modules by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+
+class TestPreferenceCache(TestCase):
+    def test_entries_expire_after_ttl(self):
+        from preference_cache import PreferenceCache
+
+        cache = PreferenceCache(ttl=60)
+        with mock.patch('preference_cache.time.monotonic', return_value=100):
+            cache.set(1, {'user_id': 1}, '"v1"')
+            self.assertTrue(cache.get(1).is_fresh())
+        with mock.patch('preference_cache.time.monotonic', return_value=160):
+            entry = cache.get(1)
+            # kept past its TTL so the ETag can revalidate it
+            self.assertFalse(entry.is_fresh())
+            self.assertEqual(entry.etag, '"v1"')
+            cache.touch(1)
+        with mock.patch('preference_cache.time.monotonic', return_value=200):
+            self.assertTrue(cache.get(1).is_fresh())
+
+    def test_evicts_least_recently_used(self):
+        from preference_cache import PreferenceCache
+
+        cache = PreferenceCache(max_entries=2)
+        cache.set(1, {'user_id': 1}, None)
+        cache.set(2, {'user_id': 2}, None)
+        cache.get(1)
+        cache.set(3, {'user_id': 3}, None)
+
+        self.assertIsNotNone(cache.get(1))
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(3))
+        self.assertEqual(cache.get_stats()['size'], 2)
+
+    def test_delete(self):
+        from preference_cache import PreferenceCache
+
+        cache = PreferenceCache()
+        cache.set(1, {'user_id': 1}, None)
+        cache.delete(1)
+        cache.delete(2)
+
+        self.assertIsNone(cache.get(1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import json
+import os
+import sys
+from unittest import IsolatedAsyncioTestCase, main
+
+import httpx
+
+# the bot runs from src/ and imports its modules by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+BASE_URL = 'https://api.test/preferences'
+preference = {'user_id': 1, 'max_price': 800000, 'job_frequency_hours': 1}
+
+
+class TestPreferenceClient(IsolatedAsyncioTestCase):
+    def setUp(self):
+        from preference_client import PreferenceClient
+
+        self.requests = []
+        self.responses = []
+        self.client = PreferenceClient(BASE_URL)
+        self.client._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handle)
+        )
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.responses.pop(0)
+
+    def respond(self, status_code: int, body=None, etag=None):
+        headers = {'ETag': etag} if etag else {}
+        content = json.dumps(body).encode() if body is not None else b''
+        self.responses.append(
+            httpx.Response(status_code, headers=headers, content=content)
+        )
+
+    async def test_get_serves_fresh_entries_from_cache(self):
+        self.respond(200, preference, '"v1"')
+
+        self.assertEqual(await self.client.get(1), preference)
+        self.assertEqual(await self.client.get(1), preference)
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.client.cache.get_stats()['hits'], 1)
+
+    async def test_get_revalidates_expired_entries(self):
+        self.client.cache.ttl = 0
+        self.respond(200, preference, '"v1"')
+        self.respond(304)
+
+        await self.client.get(1)
+        result = await self.client.get(1)
+
+        self.assertEqual(result, preference)
+        self.assertEqual(self.requests[1].headers['If-None-Match'], '"v1"')
+        self.assertEqual(self.client.cache.get_stats()['revalidations'], 1)
+
+    async def test_get_evicts_on_404(self):
+        self.client.cache.ttl = 0
+        self.client.cache.set(1, preference, '"v1"')
+        self.respond(404)
+
+        self.assertIsNone(await self.client.get(1))
+        self.assertIsNone(self.client.cache.get(1))
+
+    async def test_create_writes_through(self):
+        self.respond(201, preference, '"v1"')
+
+        self.assertTrue(await self.client.create(preference))
+        entry = self.client.cache.get(1)
+
+        self.assertEqual(entry.preference, preference)
+        self.assertEqual(entry.etag, '"v1"')
+
+    async def test_update_sends_etag_and_writes_through(self):
+        self.client.cache.set(1, preference, '"v1"')
+        self.respond(200, {'max_price': 900000}, '"v2"')
+
+        changes = {'user_id': 1, 'max_price': 900000}
+        self.assertTrue(await self.client.update(changes))
+        entry = self.client.cache.get(1)
+
+        self.assertEqual(self.requests[0].headers['If-Match'], '"v1"')
+        self.assertEqual(entry.preference, {**preference, 'max_price': 900000})
+        self.assertEqual(entry.etag, '"v2"')
+
+    async def test_update_evicts_on_conflict_or_missing(self):
+        for status_code in (412, 404):
+            with self.subTest(status_code=status_code):
+                self.client.cache.set(1, preference, '"v1"')
+                self.respond(status_code)
+
+                self.assertFalse(await self.client.update(dict(preference)))
+                self.assertIsNone(self.client.cache.get(1))
+
+    async def test_delete_evicts(self):
+        self.client.cache.set(1, preference, '"v1"')
+        self.respond(200)
+
+        self.assertTrue(await self.client.delete(1))
+        self.assertIsNone(self.client.cache.get(1))
+
+
+if __name__ == '__main__':
+    main()
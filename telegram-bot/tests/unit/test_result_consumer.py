@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+from unittest import IsolatedAsyncioTestCase, main, mock
+
+# the bot runs from src/ and imports its modules by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+
+def make_message(body, receives: int = 1):
+    return {
+        'Body': json.dumps(body),
+        'ReceiptHandle': f'handle-{receives}',
+        'Attributes': {'ApproximateReceiveCount': str(receives)}
+    }
+
+
+class TestResultConsumer(IsolatedAsyncioTestCase):
+    def setUp(self):
+        from result_consumer import ResultConsumer
+
+        self.consumer = ResultConsumer('https://sqs.test/results', None, None)
+
+    async def test_handle_keeps_failed_messages_for_retry(self):
+        delivered = []
+
+        async def handler(body):
+            if body['user_id'] == 2:
+                raise Exception('timed out')
+            delivered.append(body['user_id'])
+
+        ok, failed = make_message({'user_id': 1}), make_message({'user_id': 2})
+        handled = await self.consumer.handle([ok, failed], handler)
+
+        self.assertEqual(delivered, [1])
+        self.assertEqual(handled, [ok])
+
+    async def test_handle_drops_messages_after_max_receives(self):
+        from project_config import RESULT_QUEUE_MAX_RECEIVES
+
+        handler = mock.AsyncMock(side_effect=Exception('timed out'))
+        message = make_message({'user_id': 1}, RESULT_QUEUE_MAX_RECEIVES)
+
+        handled = await self.consumer.handle([message], handler)
+
+        self.assertEqual(handled, [message])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+import json
+import os
+import sys
+from unittest import IsolatedAsyncioTestCase, main, mock
+
+# the bot runs from src/ and imports its modules by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+
+class FakeJob:
+    def __init__(self, name: str, first: float, data):
+        self.name = name
+        self.first = first
+        self.data = data
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+
+class FakeJobQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def get_jobs_by_name(self, name: str):
+        return [job for job in self.jobs if job.name == name and not job.removed]
+
+    def run_repeating(self, callback, interval, first, data, name):
+        job = FakeJob(name, first, data)
+        self.jobs.append(job)
+        return job
+
+
+def make_preference(user_id: int, frequency: int = 1):
+    return {'user_id': user_id, 'job_frequency_hours': frequency}
+
+
+class TestScheduler(IsolatedAsyncioTestCase):
+    def test_format_links_splits_long_results(self):
+        from project_config import MESSAGE_LIMIT
+        from scheduler import format_links, format_listing
+
+        links = [
+            [f'Blk {i} ' + 'x' * 200, f'https://a.test/listing/{i}',
+             str(i), 800000, 1200, 3, 1995, '5m']
+            for i in range(60)
+        ]
+
+        messages = format_links({'statusCode': 200, 'links': links})
+
+        self.assertGreater(len(messages), 1)
+        for message in messages:
+            self.assertLessEqual(len(message), MESSAGE_LIMIT)
+        # listings are never cut between messages
+        self.assertEqual(
+            ''.join(messages),
+            'New listings found!\n' + ''.join(map(format_listing, links))
+        )
+        self.assertEqual(
+            format_links({'statusCode': 200, 'links': []}),
+            ['No new listings found\n']
+        )
+
+    def make_scheduler(self, **kwargs):
+        from scheduler import ScrapeScheduler
+
+        invoker = mock.Mock()
+        invoker.invoke = mock.AsyncMock(side_effect=self.invoke)
+        return ScrapeScheduler(invoker, **kwargs)
+
+    async def invoke(self, payload, wait=True):
+        preferences = json.loads(payload)['preferences']
+        return {
+            'statusCode': 200,
+            'body': json.dumps([
+                {'user_id': p['user_id'], 'statusCode': 200, 'links': []}
+                for p in preferences
+            ])
+        }
+
+    def test_add_joins_least_loaded_bucket(self):
+        scheduler = self.make_scheduler(slots=2)
+        job_queue = FakeJobQueue()
+
+        for chat_id in (1, 2, 3):
+            scheduler.add(chat_id, make_preference(chat_id), job_queue)
+        scheduler.add(4, make_preference(4, frequency=3), job_queue)
+
+        self.assertEqual(scheduler.chat_buckets, {
+            1: (1, 0), 2: (1, 1), 3: (1, 0), 4: (3, 0)
+        })
+        # one repeating job per bucket, not per chat
+        self.assertEqual(
+            [job.name for job in job_queue.jobs],
+            ['scrape-1h-0', 'scrape-1h-1', 'scrape-3h-0']
+        )
+
+    def test_add_spreads_buckets_across_interval(self):
+        scheduler = self.make_scheduler(slots=4)
+        job_queue = FakeJobQueue()
+
+        with mock.patch('scheduler.random.uniform', return_value=0):
+            for chat_id in (1, 2, 3, 4):
+                scheduler.add(chat_id, make_preference(chat_id), job_queue)
+
+        self.assertEqual(
+            [job.first for job in job_queue.jobs],
+            [0, 900, 1800, 2700]
+        )
+
+    def test_add_accepts_string_frequency(self):
+        # preferences stored before the API returned numbers
+        scheduler = self.make_scheduler(slots=1)
+        job_queue = FakeJobQueue()
+
+        scheduler.add(1, make_preference(1, frequency='3'), job_queue)
+        scheduler.add(2, make_preference(2, frequency=3), job_queue)
+
+        self.assertEqual(scheduler.chat_buckets, {1: (3, 0), 2: (3, 0)})
+        self.assertEqual([job.name for job in job_queue.jobs], ['scrape-3h-0'])
+
+    def test_remove_drops_empty_bucket(self):
+        scheduler = self.make_scheduler(slots=1)
+        job_queue = FakeJobQueue()
+        scheduler.add(1, make_preference(1), job_queue)
+        scheduler.add(2, make_preference(2), job_queue)
+
+        self.assertTrue(scheduler.remove(1, job_queue))
+        self.assertFalse(job_queue.jobs[0].removed)
+        self.assertTrue(scheduler.remove(2, job_queue))
+        self.assertTrue(job_queue.jobs[0].removed)
+        self.assertEqual(scheduler.buckets, {})
+        self.assertFalse(scheduler.remove(2, job_queue))
+
+    def test_readding_moves_chat(self):
+        scheduler = self.make_scheduler(slots=1)
+        job_queue = FakeJobQueue()
+        scheduler.add(1, make_preference(1), job_queue)
+        scheduler.add(1, make_preference(1, frequency=3), job_queue)
+
+        self.assertEqual(scheduler.chat_buckets, {1: (3, 0)})
+        self.assertEqual(list(scheduler.buckets), [(3, 0)])
+
+    def test_get_batches(self):
+        scheduler = self.make_scheduler(slots=1, batch_size=2)
+        job_queue = FakeJobQueue()
+        for chat_id in (1, 2, 3):
+            scheduler.add(chat_id, make_preference(chat_id), job_queue)
+
+        batches = scheduler.get_batches((1, 0))
+
+        self.assertEqual(
+            [[chat_id for chat_id, _ in batch] for batch in batches],
+            [[1, 2], [3]]
+        )
+        self.assertEqual(scheduler.get_batches((6, 0)), [])
+
+    async def test_run_bucket_invokes_each_batch(self):
+        scheduler = self.make_scheduler(slots=1, batch_size=2)
+        job_queue = FakeJobQueue()
+        for chat_id in (1, 2, 3):
+            scheduler.add(chat_id, make_preference(chat_id), job_queue)
+        context = mock.Mock()
+        context.job.data = (1, 0)
+        context.bot.send_message = mock.AsyncMock()
+
+        await scheduler.run_bucket(context)
+
+        self.assertEqual(scheduler.invoker.invoke.await_count, 2)
+        self.assertEqual(
+            sorted(
+                c.kwargs['chat_id']
+                for c in context.bot.send_message.await_args_list
+            ),
+            [1, 2, 3]
+        )
+
+    async def test_run_batch_continues_after_failed_send(self):
+        scheduler = self.make_scheduler(slots=1)
+        context = mock.Mock()
+        context.bot.send_message = mock.AsyncMock(
+            side_effect=[Exception('Forbidden: bot was blocked'), None, None]
+        )
+        batch = [(chat_id, make_preference(chat_id)) for chat_id in (1, 2, 3)]
+
+        await scheduler.run_batch(context, batch)
+
+        self.assertEqual(
+            [c.kwargs['chat_id'] for c in context.bot.send_message.await_args_list],
+            [1, 2, 3]
+        )
+
+    async def test_run_batch_names_result_queue(self):
+        scheduler = self.make_scheduler(result_queue_url='https://sqs.test/q')
+        scheduler.invoker.invoke.side_effect = None
+        scheduler.invoker.invoke.return_value = {'statusCode': 202}
+        context = mock.Mock()
+        context.bot.send_message = mock.AsyncMock()
+
+        await scheduler.run_batch(context, [(1, make_preference(1))])
+
+        payload = scheduler.invoker.invoke.await_args.args[0]
+        self.assertEqual(
+            json.loads(payload)['result_queue_url'],
+            'https://sqs.test/q'
+        )
+        self.assertEqual(scheduler.invoker.invoke.await_args.kwargs, {'wait': False})
+        context.bot.send_message.assert_not_awaited()
+
+    async def test_deliver_drops_permanent_failures(self):
+        from telegram.error import BadRequest, Forbidden, TimedOut
+
+        scheduler = self.make_scheduler(slots=1)
+        scheduler.add(1, make_preference(1), FakeJobQueue())
+        message = {
+            'user_id': 1,
+            'statusCode': 200,
+            'page': 1,
+            'links': [['Unit A', '/listing/a-1']],
+            'final': False
+        }
+        bot = mock.Mock()
+
+        for error in (Forbidden('blocked'), BadRequest('too long')):
+            bot.send_message = mock.AsyncMock(side_effect=error)
+            await scheduler.deliver(bot, message)
+        # transient errors are raised so the queue retries the message
+        bot.send_message = mock.AsyncMock(side_effect=TimedOut())
+        with self.assertRaises(TimedOut):
+            await scheduler.deliver(bot, message)
+
+    async def test_run_batch_reports_invoke_failure(self):
+        scheduler = self.make_scheduler(slots=1)
+        scheduler.invoker.invoke.side_effect = Exception('timeout')
+        context = mock.Mock()
+        context.bot.send_message = mock.AsyncMock()
+
+        await scheduler.run_batch(context, [(1, make_preference(1))])
+
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=1,
+            text='An error occurred when running scraper...'
+        )
+
+
+if __name__ == '__main__':
+    main()
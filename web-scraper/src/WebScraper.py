@@ -1,50 +1,113 @@
-import time
-from scrapingant_client import ScrapingAntClient
-from typing import List, Tuple
+import asyncio
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from bs4 import BeautifulSoup
+from src.cache import ResultCache, get_cache_key
+from src.client import get_client
+from src.listing import Listing, parse_listing
+from src.parsers import get_parser
 from src.project_config import (
     MAX_PAGES,
-    SCRAPER_INIT_RETRIES,
-    SCRAPER_ERROR_RETRIES
+    SCRAPER_CONCURRENCY,
+    SCRAPER_PARSER,
+    SCRAPER_TIME_BUDGET
+)
+from src.retry import (
+    CAPTCHA,
+    CONNECTION_ERROR,
+    Deadline,
+    Retrier
 )
 
 
 class WebScraper:
     def __init__(self, url: str,
                  frequency_hours: int,
-                 token: str):
+                 token: str,
+                 time_budget: float = SCRAPER_TIME_BUDGET,
+                 parser: str = SCRAPER_PARSER,
+                 cache: Optional[ResultCache] = None,
+                 max_pages: int = MAX_PAGES):
         self.url = url
         self.token = token
         self.frequency_hours = frequency_hours
+        self.parse = get_parser(parser)
+        self.cache = cache
+        self.max_pages = max_pages
+        self.deadline = Deadline(time_budget)
+        self.fetches_saved = 0
         self.soup = self.create_soup(self.url)
 
-    def create_soup(self, url: str):
-        found = False
-        for i in range(SCRAPER_ERROR_RETRIES):
-            print(f'Initialize scraper loop {i}...')
+    def fetch_content(self, url: str) -> str:
+        return get_client(self.token).general_request(url).content
+
+    def fetch_soup(self, url: str) -> Tuple[str, BeautifulSoup]:
+        content = self.fetch_content(url)
+        return content, self.parse(content)
+
+    def check_soup(self, url: str, soup: BeautifulSoup) -> bool:
+        if 'captcha' in soup.text:
+            return False
+        if 'No Results' in soup.text:
+            print(f'Invalid URL, skipping {url}')
+        return True
+
+    def get_cached(self, page: int) -> Optional[str]:
+        if not self.cache:
+            return
+        return self.cache.get(get_cache_key(self.url, page))
+
+    def set_cached(self, page: int, content: str) -> None:
+        if self.cache:
+            self.cache.set(get_cache_key(self.url, page), content)
+
+    def create_soup(self, url: str, page: int = 1) -> Optional[BeautifulSoup]:
+        content = self.get_cached(page)
+        if content is not None:
+            return self.parse(content)
+        retrier = Retrier(self.deadline)
+        while True:
             try:
-                for j in range(SCRAPER_INIT_RETRIES):
-                    client = ScrapingAntClient(token=self.token)
-                    result = client.general_request(url)
-                    soup = BeautifulSoup(result.content, 'html.parser')
-                    if 'captcha' in soup.text:
-                        print(f'Retrying {j} / {SCRAPER_INIT_RETRIES}')
-                        time.sleep(0.1)
-                        if j > 0 and j % 10 == 0:
-                            print('Connection reset, retrying in 30 secs...',
-                                  flush=True)
-                            time.sleep(30)
-                        continue
-                    if 'No Results' in soup.text:
-                        print(f'Invalid URL, skipping {url}')
-                    found = True
+                content, soup = self.fetch_soup(url)
+            except Exception as e:
+                print(e)
+                print('Connection reset, backing off...', flush=True)
+                if not retrier.backoff(CONNECTION_ERROR):
                     break
-                if found:
-                    return soup
+                continue
+            if self.check_soup(url, soup):
+                self.set_cached(page, content)
+                return soup
+            print(f'Captcha received, retry {retrier.attempts[CAPTCHA] + 1}')
+            if not retrier.backoff(CAPTCHA):
+                break
+        print(f'Giving up on {url}', flush=True)
+        return
+
+    async def create_soup_async(
+            self,
+            url: str,
+            page: int = 1
+    ) -> Optional[BeautifulSoup]:
+        content = await asyncio.to_thread(self.get_cached, page)
+        if content is not None:
+            return await asyncio.to_thread(self.parse, content)
+        retrier = Retrier(self.deadline)
+        while True:
+            try:
+                content, soup = await asyncio.to_thread(self.fetch_soup, url)
             except Exception as e:
                 print(e)
-                print('Connection reset, retrying in 1 min...', flush=True)
-                time.sleep(60)
+                print('Connection reset, backing off...', flush=True)
+                if not await retrier.backoff_async(CONNECTION_ERROR):
+                    break
+                continue
+            if self.check_soup(url, soup):
+                await asyncio.to_thread(self.set_cached, page, content)
+                return soup
+            print(f'Captcha received, retry {retrier.attempts[CAPTCHA] + 1}')
+            if not await retrier.backoff_async(CAPTCHA):
+                break
+        print(f'Giving up on {url}', flush=True)
         return
 
     def get_number_of_pages(self) -> int:
@@ -63,41 +126,137 @@ class WebScraper:
                 print('No property found. Scraping stopped.')
         return pages
 
-    def get_links(self, soup) -> List[Tuple[str, str]]:
+    def is_recent(self, listing_recency: str) -> bool:
+        if listing_recency[-1] == 'm':
+            return True
+        if listing_recency[-1] == 'h':
+            return int(listing_recency[:-1]) < self.frequency_hours
+        return False
+
+    def extract_links(self, soup) -> Tuple[List[Listing], bool]:
+        """Return the recent links on a page, and whether the page also
+        held listings older than the frequency window. Results are sorted
+        by recency, so later pages cannot contain anything newer."""
         links = []
+        exhausted = False
         units = soup.find_all('div', itemtype='https://schema.org/Place')
         for unit in units:
             listing_recency = unit.find('div', class_='listing-recency').text
-            prop = unit.find('a', class_='nav-link')
-            if listing_recency[-1] == 'm':
-                links.append((prop['title'], prop['href']))
-                continue
-            if listing_recency[-1] == 'h':
-                hours_ago = listing_recency[:-1]
-                if int(hours_ago) < self.frequency_hours:
-                    links.append((prop['title'], prop['href']))
-        return links
+            if self.is_recent(listing_recency):
+                links.append(parse_listing(unit, listing_recency))
+            else:
+                exhausted = True
+        return links, exhausted
+
+    def get_links(self, soup) -> List[Listing]:
+        return self.extract_links(soup)[0]
 
-    def scrape_pages(self) -> List[Tuple[str, str]]:
+    def get_page_url(self, page: int) -> str:
+        if page == 1:
+            return self.url
+        question_idx = self.url.find('?')
+        return self.url[:question_idx] + f'/{page}' + self.url[question_idx:]
+
+    def iter_pages(self) -> Iterator[Tuple[int, List[Listing]]]:
+        """Yield each page's recent listings as soon as it is parsed, so
+        callers can pass them on without waiting for the slowest page"""
         pages = self.get_number_of_pages()
         print(f'Found {pages} pages')
         if pages == 0:
-            return []
-        pages = min(pages, MAX_PAGES)
+            return
+        pages = min(pages, self.max_pages)
         print(f'Scraping {pages} pages...')
-        links = []
-        links += self.get_links(self.soup)
+        links, exhausted = self.extract_links(self.soup)
         print(f'Page 1 / {pages} done')
+        yield 1, links
         for page in range(2, pages + 1):
-            if page == 2:
-                question_idx = self.url.find('?')
-                url = self.url[:question_idx] + '/2' + \
-                    self.url[question_idx:]
-            else:
-                previous = f'/{page - 1}'
-                url = f'/{page}'.join(url.split(previous))
+            if exhausted:
+                self.fetches_saved = pages - page + 1
+                print(f'Recency window exhausted, skipped '
+                      f'{self.fetches_saved} page fetches')
+                break
+            if self.deadline.expired():
+                print(f'Time budget exhausted, stopping before page {page}')
+                break
+            url = self.get_page_url(page)
             print(f'Page {page}: {url}')
-            soup = self.create_soup(url)
-            links += self.get_links(soup)
+            soup = self.create_soup(url, page)
+            if not soup:
+                print(f'Page {page} could not be scraped, skipping')
+                continue
+            page_links, exhausted = self.extract_links(soup)
             print(f'Page {page} / {pages} done')
-        return links
+            yield page, page_links
+
+    def scrape_pages(self) -> List[Listing]:
+        return [link for _, links in self.iter_pages() for link in links]
+
+    async def iter_pages_async(
+            self,
+            concurrency: int = SCRAPER_CONCURRENCY
+    ) -> AsyncIterator[Tuple[int, List[Listing]]]:
+        """Fetch up to concurrency pages at once and yield each page's
+        recent listings as it completes, so pages may arrive out of
+        order. Pages past one that exhausted the recency window are not
+        fetched unless they were already under way, and those only hold
+        older listings."""
+        pages = self.get_number_of_pages()
+        print(f'Found {pages} pages')
+        if pages == 0:
+            return
+        pages = min(pages, self.max_pages)
+        links, exhausted = self.extract_links(self.soup)
+        yield 1, links
+        if exhausted:
+            self.fetches_saved = pages - 1
+            print(f'Recency window exhausted on page 1, skipped '
+                  f'{self.fetches_saved} page fetches')
+            return
+        print(f'Scraping {pages} pages with concurrency {concurrency}...')
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        exhausted_page = pages + 1
+
+        async def fetch(page: int) -> Tuple[int, Optional[List[Listing]]]:
+            nonlocal exhausted_page
+            async with semaphore:
+                if page > exhausted_page:
+                    self.fetches_saved += 1
+                    return page, None
+                if self.deadline.expired():
+                    print(f'Time budget exhausted, skipping page {page}')
+                    return page, None
+                url = self.get_page_url(page)
+                print(f'Page {page}: {url}')
+                soup = await self.create_soup_async(url, page)
+                if not soup:
+                    print(f'Page {page} could not be scraped, skipping')
+                    return page, None
+                page_links, exhausted = self.extract_links(soup)
+                if exhausted:
+                    exhausted_page = min(exhausted_page, page)
+                print(f'Page {page} / {pages} done')
+                return page, page_links
+
+        tasks = [asyncio.create_task(fetch(page)) for page in range(2, pages + 1)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                page, page_links = await task
+                if page_links is not None:
+                    yield page, page_links
+        finally:
+            # the caller may stop early, leave no fetches running behind it
+            for task in tasks:
+                task.cancel()
+        if self.fetches_saved:
+            print(f'Recency window exhausted on page {exhausted_page}, '
+                  f'skipped {self.fetches_saved} page fetches')
+
+    async def scrape_pages_async(
+            self,
+            concurrency: int = SCRAPER_CONCURRENCY
+    ) -> List[Listing]:
+        results = {
+            page: links
+            async for page, links in self.iter_pages_async(concurrency)
+        }
+        return [link for page in sorted(results) for link in results[page]]
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from src.project_config import (
+    CACHE_BACKEND,
+    CACHE_DIR,
+    CACHE_MAX_ENTRIES,
+    CACHE_TABLE,
+    CACHE_TTL_SECONDS
+)
+from src.url_builder import get_search_hash
+
+
+def get_cache_key(url: str, page: int) -> str:
+    return f'{get_search_hash(url)}#page={page}'
+
+
+class MemoryBackend:
+    """LRU of page contents kept for the life of a warm Lambda"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self.entries[key]
+                return
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class FileBackend:
+    """One JSON file per key, for local runs and the Lambda /tmp volume"""
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, key: str) -> str:
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, f'{name}.json')
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self.get_path(key), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return
+        if entry['expires_at'] <= time.time():
+            return
+        return entry['value']
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        path = self.get_path(key)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({'expires_at': time.time() + ttl, 'value': value}, f)
+        os.replace(f'{path}.tmp', path)
+
+
+class DynamoBackend:
+    """Shared across Lambda containers. Pages are compressed to stay well
+    under the DynamoDB item size limit, and expires_at doubles as the
+    table's TTL attribute."""
+
+    def __init__(self, table_name: str = CACHE_TABLE):
+        import boto3
+
+        self.table = boto3.resource('dynamodb').Table(table_name)
+
+    def get(self, key: str) -> Optional[str]:
+        item = self.table.get_item(Key={'cache_key': key}).get('Item')
+        if not item or int(item['expires_at']) <= time.time():
+            return
+        return zlib.decompress(item['content'].value).decode()
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self.table.put_item(Item={
+            'cache_key': key,
+            'content': zlib.compress(value.encode()),
+            'expires_at': int(time.time() + ttl)
+        })
+
+
+class ResultCache:
+    def __init__(self, backend, ttl: float = CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            print(e)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+backends = {
+    'memory': MemoryBackend,
+    'file': FileBackend,
+    'dynamodb': DynamoBackend
+}
+
+_cache: Optional[ResultCache] = None
+
+
+def get_cache() -> Optional[ResultCache]:
+    """Return the cache selected by CACHE_BACKEND, or None if disabled"""
+    global _cache
+    name = os.environ.get('CACHE_BACKEND', CACHE_BACKEND)
+    if name == 'none':
+        return
+    if _cache is None:
+        _cache = ResultCache(backends[name]())
+    return _cache
+
+
+def reset_cache() -> None:
+    global _cache
+    _cache = None
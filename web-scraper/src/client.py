@@ -0,0 +1,39 @@
+import threading
+from requests.adapters import HTTPAdapter
+from scrapingant_client import ScrapingAntClient
+from typing import Dict
+from src.project_config import BATCH_CONCURRENCY, SCRAPER_CONCURRENCY
+
+# Kept at module scope so warm Lambda invocations reuse open connections
+_clients: Dict[str, ScrapingAntClient] = {}
+_lock = threading.Lock()
+
+
+def get_client(token: str) -> ScrapingAntClient:
+    client = _clients.get(token)
+    if client:
+        return client
+    with _lock:
+        if token not in _clients:
+            _clients[token] = create_client(token)
+        return _clients[token]
+
+
+def create_client(token: str) -> ScrapingAntClient:
+    client = ScrapingAntClient(token=token)
+    # one pool slot per concurrent page fetch so workers do not
+    # discard each other's keep-alive connections
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=max(SCRAPER_CONCURRENCY * BATCH_CONCURRENCY, 1)
+    )
+    client.requests_session.mount('https://', adapter)
+    client.requests_session.headers.update({'Connection': 'keep-alive'})
+    return client
+
+
+def reset_clients() -> None:
+    with _lock:
+        for client in _clients.values():
+            client.requests_session.close()
+        _clients.clear()
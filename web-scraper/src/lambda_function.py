@@ -1,16 +1,30 @@
+import asyncio
 import json
 import os
 from src.project_config import (
     URI,
-    preference_mapper,
-    query_mapper,
-    numeric_cols
+    BATCH_CONCURRENCY,
+    MAX_PAGES,
+    SCRAPER_CONCURRENCY,
+    SCRAPER_PARSER,
+    SCRAPER_TIME_BUDGET,
+    SCRAPER_TIME_MARGIN,
+    SEEN_WINDOW_SLACK_HOURS,
+    SHARED_MAX_PAGES
 )
+from src.cache import get_cache
+from src.listing import Listing
+from src.listing_filter import ListingColumns
+from src.seen_store import filter_unseen, get_seen_store, mark_seen
+from src.sinks import get_sink
+from src.url_builder import build_search_url, build_shared_search_url
 from src.WebScraper import WebScraper
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 
 def lambda_handler(event, context):
+    if 'preferences' in event:
+        return batch_handler(event, context)
     try:
         print('Starting application...')
         SCRAPING_ANT_TOKEN = os.environ['SCRAPING_ANT_TOKEN']
@@ -19,17 +33,22 @@ def lambda_handler(event, context):
             event=event
         )
         print('base url: ' + url)
-        web_scraper = WebScraper(
+        links = asyncio.run(scrape(
             url=url,
             frequency_hours=int(event['job_frequency_hours']),
-            token=SCRAPING_ANT_TOKEN
-        )
-        links = web_scraper.scrape_pages()
+            token=SCRAPING_ANT_TOKEN,
+            context=context
+        ))
+        links = ListingColumns(links).select(event)
+        links = remove_seen(event.get('user_id'), links)
         print(links)
+        print_cache_stats()
+        body = json.dumps(serialise_listings(links))
+        record_seen(event.get('user_id'), links)
         return {
             "statusCode": 200,
             "headers": {},
-            "body": json.dumps(links)
+            "body": body
         }
 
     except Exception as e:
@@ -42,32 +61,322 @@ def lambda_handler(event, context):
     }
 
 
-def create_url(url: str, event: Dict) -> str:
-    if 'listing_type' not in event:
-        return ''
-    value = event['listing_type']
-    value = preference_mapper['listing_type'][value]
-    url += f'property-for-{value}?market=residential&listing_type={value}'
-    for key, value in event.items():
-        if key in ['user_id', 'job_frequency_hours', 'listing_type']:
+def batch_handler(event, context):
+    try:
+        print('Starting batch application...')
+        SCRAPING_ANT_TOKEN = os.environ['SCRAPING_ANT_TOKEN']
+        searches, failed = group_searches(event['preferences'])
+        print(f"{len(searches)} unique searches for "
+              f"{len(event['preferences'])} preferences")
+        sink = get_sink(event.get('result_queue_url'))
+        if sink:
+            body = asyncio.run(stream_searches(
+                searches=searches,
+                token=SCRAPING_ANT_TOKEN,
+                context=context,
+                sink=sink
+            ))
+            failures = [
+                {"user_id": p.get('user_id'), "statusCode": 500, "total": 0}
+                for p in failed
+            ]
+            if failures:
+                sink.send([
+                    dict(result, page=None, links=[], final=True)
+                    for result in failures
+                ])
+            body.extend(failures)
+            print_cache_stats()
+            return {
+                "statusCode": 200,
+                "headers": {},
+                "body": json.dumps(body)
+            }
+        results = asyncio.run(scrape_searches(
+            searches=searches,
+            token=SCRAPING_ANT_TOKEN,
+            context=context
+        ))
+        print_cache_stats()
+        body = []
+        returned = []
+        for url, preferences in searches.items():
+            links = results.get(url)
+            columns = ListingColumns(links or [])
+            for preference in preferences:
+                user_id = preference.get('user_id')
+                selected = remove_seen(user_id, columns.select(
+                    preference,
+                    get_window_hours(get_frequency(preference))
+                ))
+                returned.append((user_id, selected))
+                body.append({
+                    "user_id": user_id,
+                    "statusCode": 500 if links is None else 200,
+                    "links": serialise_listings(selected)
+                })
+        body.extend(
+            {"user_id": p.get('user_id'), "statusCode": 500, "links": []}
+            for p in failed
+        )
+        response = json.dumps(body)
+        for user_id, selected in returned:
+            record_seen(user_id, selected)
+        return {
+            "statusCode": 200,
+            "headers": {},
+            "body": response
+        }
+
+    except Exception as e:
+        print(e)
+
+    return {
+        "statusCode": 500,
+        "headers": {},
+        "body": "Internal Server Error"
+    }
+
+
+def get_frequency(preference: Dict) -> int:
+    return int(preference.get('job_frequency_hours', 0))
+
+
+def get_window_hours(frequency_hours: int) -> int:
+    if get_seen_store():
+        # seen listings are filtered out afterwards, so widen the window
+        # to cover jobs that fire late instead of leaving gaps
+        return frequency_hours + SEEN_WINDOW_SLACK_HOURS
+    return frequency_hours
+
+
+def get_max_pages(preferences: List[Dict]) -> int:
+    return SHARED_MAX_PAGES if len(preferences) > 1 else MAX_PAGES
+
+
+def group_searches(
+        preferences: List[Dict]
+) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+    """Group preferences that share a search so each one is scraped
+    once, over the widest recency window in the group. Each preference
+    then takes its own subset with ListingColumns. A preference alone in
+    its group gains nothing from the broader search, so it keeps its
+    full one.
+    Preferences no search can be built for are returned separately so
+    they fail on their own."""
+    groups, failed = {}, []
+    for preference in preferences:
+        try:
+            shared_url = build_shared_search_url(URI, preference)
+            url = create_url(url=URI, event=preference)
+        except Exception as e:
+            print(f"Could not build a search for {preference.get('user_id')}: {e!r}")
+            failed.append(preference)
+            continue
+        groups.setdefault(shared_url, []).append((url, preference))
+    searches = {}
+    for shared_url, group in groups.items():
+        if len(group) == 1:
+            shared_url = group[0][0]
+        searches.setdefault(shared_url, []).extend(p for _, p in group)
+    return searches, failed
+
+
+async def scrape_searches(
+        searches: Dict[str, List[Dict]],
+        token: str,
+        context
+) -> Dict[str, Optional[List[Listing]]]:
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(url: str, preferences: List[Dict]):
+        if not url:
+            print('Preference is missing a listing type, skipping')
+            return
+        async with semaphore:
+            try:
+                return await scrape(
+                    url,
+                    max(get_frequency(p) for p in preferences),
+                    token,
+                    context,
+                    get_max_pages(preferences)
+                )
+            except Exception as e:
+                print(e)
+
+    results = await asyncio.gather(*(run(*search) for search in searches.items()))
+    return dict(zip(searches, results))
+
+
+async def stream_searches(
+        searches: Dict[str, List[Dict]],
+        token: str,
+        context,
+        sink
+) -> List[Dict]:
+    """Send each user their share of every page as soon as it is parsed,
+    then a final message per user once their search is done. Returns
+    how many listings each user was sent."""
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(url: str, preferences: List[Dict]) -> List[Dict]:
+        totals = [0] * len(preferences)
+        status = 200
+        async with semaphore:
+            try:
+                await stream_search(
+                    url, preferences, totals, token, context, sink
+                )
+            except Exception as e:
+                print(e)
+                status = 500
+        results = [
+            {
+                "user_id": preference.get('user_id'),
+                "statusCode": status,
+                "total": total
+            }
+            for preference, total in zip(preferences, totals)
+        ]
+        await asyncio.to_thread(sink.send, [
+            dict(result, page=None, links=[], final=True) for result in results
+        ])
+        return results
+
+    results = await asyncio.gather(*(
+        run(url, preferences) for url, preferences in searches.items()
+    ))
+    return [result for search_results in results for result in search_results]
+
+
+async def stream_search(url: str,
+                        preferences: List[Dict],
+                        totals: List[int],
+                        token: str,
+                        context,
+                        sink) -> None:
+    # totals are counted as pages go out, so they stay right if a later
+    # page fails
+    if not url:
+        raise ValueError('Preference is missing a listing type')
+    windows = [get_window_hours(get_frequency(p)) for p in preferences]
+    web_scraper = await asyncio.to_thread(
+        create_scraper,
+        url,
+        max(windows),
+        token,
+        context,
+        get_max_pages(preferences)
+    )
+    async for page, links in web_scraper.iter_pages_async(get_concurrency()):
+        await asyncio.to_thread(
+            send_page, page, links, preferences, windows, totals, sink
+        )
+
+
+def send_page(page: int,
+              links: List[Listing],
+              preferences: List[Dict],
+              windows: List[int],
+              totals: List[int],
+              sink) -> None:
+    """Send each user their share of one page. Blocks on the seen store
+    and the sink, so it runs off the event loop."""
+    columns = ListingColumns(links)
+    messages = []
+    queued = []
+    for i, (preference, window) in enumerate(zip(preferences, windows)):
+        user_id = preference.get('user_id')
+        selected = remove_seen(user_id, columns.select(preference, window))
+        if not selected:
             continue
-        mapped_key = query_mapper.get(key, key)
-        if mapped_key == 'property_type_code[]':
-            property_type = event['property_type']
-            value = preference_mapper[key][property_type][value]
-            if isinstance(value, list):
-                for item in value:
-                    url += f'&{mapped_key}={item}'
-            else:
-                url += f'&{mapped_key}={value}'
+        messages.append({
+            "user_id": user_id,
+            "statusCode": 200,
+            "page": page,
+            "links": serialise_listings(selected),
+            "final": False
+        })
+        queued.append((i, selected))
+    if not messages:
+        return
+    unsent = sink.send(messages)
+    for message, (i, selected) in zip(messages, queued):
+        if message in unsent:
             continue
-        if key in numeric_cols:
-            url += f'&{mapped_key}={value}'
-        else:
-            if key not in preference_mapper:
-                url += f'&{mapped_key}={value}'
-                continue
-            value = preference_mapper[key][value]
-            url += f'&{mapped_key}={value}'
-    url += '&search=true'
-    return url
+        totals[i] += len(selected)
+        record_seen(message['user_id'], selected)
+
+
+def create_scraper(url: str,
+                   frequency_hours: int,
+                   token: str,
+                   context,
+                   max_pages: int = MAX_PAGES) -> WebScraper:
+    return WebScraper(
+        url=url,
+        frequency_hours=frequency_hours,
+        token=token,
+        time_budget=get_time_budget(context),
+        parser=os.environ.get('SCRAPER_PARSER', SCRAPER_PARSER),
+        cache=get_cache(),
+        max_pages=max_pages
+    )
+
+
+async def scrape(url: str,
+                 frequency_hours: int,
+                 token: str,
+                 context,
+                 max_pages: int = MAX_PAGES) -> List[Listing]:
+    web_scraper = await asyncio.to_thread(
+        create_scraper,
+        url,
+        get_window_hours(frequency_hours),
+        token,
+        context,
+        max_pages
+    )
+    concurrency = get_concurrency()
+    if concurrency > 1:
+        return await web_scraper.scrape_pages_async(concurrency)
+    return await asyncio.to_thread(web_scraper.scrape_pages)
+
+
+def get_concurrency() -> int:
+    return int(os.environ.get('SCRAPER_CONCURRENCY', SCRAPER_CONCURRENCY))
+
+
+def remove_seen(user_id, links: List[Listing]) -> List[Listing]:
+    store = get_seen_store()
+    if not store or user_id is None:
+        return links
+    return filter_unseen(store, user_id, links)
+
+
+def record_seen(user_id, links: List[Listing]) -> None:
+    store = get_seen_store()
+    if store and user_id is not None:
+        mark_seen(store, user_id, links)
+
+
+def serialise_listings(links: List[Listing]) -> List[List]:
+    return [link.to_list() for link in links]
+
+
+def print_cache_stats() -> None:
+    cache = get_cache()
+    if cache:
+        print(f'Cache stats: {cache.get_stats()}')
+
+
+def get_time_budget(context) -> float:
+    if not hasattr(context, 'get_remaining_time_in_millis'):
+        return SCRAPER_TIME_BUDGET
+    remaining = context.get_remaining_time_in_millis() / 1000
+    return min(SCRAPER_TIME_BUDGET, remaining - SCRAPER_TIME_MARGIN)
+
+
+def create_url(url: str, event: Dict) -> str:
+    return build_search_url(url, event)
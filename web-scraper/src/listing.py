@@ -0,0 +1,93 @@
+import re
+from typing import List, Optional, Union
+
+NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+BUILD_YEAR = re.compile(r'Built:\s*(\d{4})')
+LISTING_ID = re.compile(r'-(\d+)/?$')
+
+Number = Union[int, float]
+
+
+class Listing:
+    """One search result card. It goes over the wire as a plain list,
+    with title and url first so it reads like the (title, href) pairs
+    it replaced."""
+
+    __slots__ = (
+        'title',
+        'url',
+        'listing_id',
+        'price',
+        'floor_size',
+        'bedrooms',
+        'build_year',
+        'recency'
+    )
+
+    def __init__(self, title: str,
+                 url: str,
+                 listing_id: Optional[str] = None,
+                 price: Optional[Number] = None,
+                 floor_size: Optional[Number] = None,
+                 bedrooms: Optional[Number] = None,
+                 build_year: Optional[int] = None,
+                 recency: Optional[str] = None):
+        self.title = title
+        self.url = url
+        self.listing_id = listing_id
+        self.price = price
+        self.floor_size = floor_size
+        self.bedrooms = bedrooms
+        self.build_year = build_year
+        self.recency = recency
+
+    def to_list(self) -> List:
+        return [getattr(self, field) for field in self.__slots__]
+
+    @classmethod
+    def from_list(cls, values: List) -> 'Listing':
+        return cls(*values)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Listing) and self.to_list() == other.to_list()
+
+    def __repr__(self) -> str:
+        return f'Listing({self.title!r}, {self.url!r})'
+
+
+def parse_number(text: Optional[str]) -> Optional[Number]:
+    if not text:
+        return
+    match = NUMBER.search(text)
+    if not match:
+        return
+    number = float(match.group().replace(',', ''))
+    return int(number) if number.is_integer() else number
+
+
+def get_text(unit, class_: str) -> Optional[str]:
+    element = unit.find(class_=class_)
+    if element is not None:
+        return element.get_text(' ', strip=True)
+
+
+def parse_listing(unit, recency: str) -> Listing:
+    """Read every field off a card in the pass that finds its link.
+    Cards missing a field leave it as None rather than failing."""
+    prop = unit.find('a', class_='nav-link')
+    href = prop['href']
+    listing_id = unit.get('data-listing-id')
+    if not listing_id:
+        match = LISTING_ID.search(href.split('?')[0])
+        listing_id = match.group(1) if match else None
+    build_year = BUILD_YEAR.search(unit.get_text(' '))
+    return Listing(
+        title=prop['title'],
+        url=href,
+        listing_id=listing_id,
+        price=parse_number(get_text(unit, 'price')),
+        floor_size=parse_number(get_text(unit, 'listing-floorarea')),
+        bedrooms=parse_number(get_text(unit, 'bed')),
+        build_year=int(build_year.group(1)) if build_year else None,
+        recency=recency
+    )
@@ -0,0 +1,95 @@
+import math
+from itertools import compress
+from typing import Dict, List, Optional, Tuple
+from src.listing import Listing
+from src.project_config import range_filters
+
+Bound = Tuple[Optional[float], Optional[float]]
+
+
+def recency_hours(recency: Optional[str]) -> float:
+    """'12m' and '3h' as hours, anything older or unreadable as infinite"""
+    if not recency:
+        return math.inf
+    try:
+        if recency[-1] == 'm':
+            return int(recency[:-1]) / 60
+        if recency[-1] == 'h':
+            return int(recency[:-1])
+    except ValueError:
+        pass
+    return math.inf
+
+
+def is_unset(value) -> bool:
+    """The bot stores 0 for any field that was never set, so 0 never
+    bounds anything: no minimum, no maximum and any number of bedrooms.
+    Studios are asked for as 'Studio'."""
+    return value in (None, '', 0, '0')
+
+
+def to_bound(value) -> Optional[float]:
+    if is_unset(value):
+        return
+    return float(value)
+
+
+def get_bedroom_bounds(value) -> Bound:
+    if is_unset(value):
+        return None, None
+    if value == 'Studio':
+        return 0, 0
+    if value == '5':
+        # the highest option stands for five or more
+        return 5, None
+    try:
+        return int(value), int(value)
+    except ValueError:
+        return None, None
+
+
+def get_bounds(preference: Dict) -> Dict[str, Bound]:
+    bounds = {
+        field: (to_bound(preference.get(low)), to_bound(preference.get(high)))
+        for field, (low, high) in range_filters.items()
+    }
+    bounds['bedrooms'] = get_bedroom_bounds(preference.get('bedrooms'))
+    return {field: bound for field, bound in bounds.items() if bound != (None, None)}
+
+
+def in_range(value, low: Optional[float], high: Optional[float]) -> bool:
+    # a field the card did not show is not held against the listing
+    if value is None:
+        return True
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+class ListingColumns:
+    """Listings split into one column per filtered field. Built once per
+    scraped search and shared by every preference selecting from it, so
+    each constraint is a single pass over one column."""
+
+    def __init__(self, listings: List[Listing]):
+        self.listings = listings
+        self.columns = {
+            field: [getattr(listing, field) for listing in listings]
+            for field in (*range_filters, 'bedrooms')
+        }
+        self.recency = [recency_hours(listing.recency) for listing in listings]
+
+    def select(self, preference: Dict,
+               window_hours: Optional[float] = None) -> List[Listing]:
+        """Listings matching the preference, and listed within
+        window_hours when one is given"""
+        mask = [True] * len(self.listings)
+        if window_hours is not None:
+            mask = [
+                keep and hours < window_hours
+                for keep, hours in zip(mask, self.recency)
+            ]
+        for field, (low, high) in get_bounds(preference).items():
+            mask = [
+                keep and in_range(value, low, high)
+                for keep, value in zip(mask, self.columns[field])
+            ]
+        return list(compress(self.listings, mask))
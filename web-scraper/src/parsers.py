@@ -0,0 +1,50 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import Callable, Dict
+
+try:
+    import lxml  # noqa: F401
+    FAST_BACKEND = 'lxml'
+except ImportError:
+    FAST_BACKEND = 'html.parser'
+
+PLACE_ITEMTYPE = 'https://schema.org/Place'
+
+
+def is_results_element(name: str, attrs: Dict[str, str]) -> bool:
+    """Match only the subtrees read by WebScraper: listing cards,
+    pagination and the search title"""
+    if name == 'div':
+        return attrs.get('itemtype') == PLACE_ITEMTYPE
+    if name == 'ul':
+        return 'pagination' in attrs.get('class', '').split()
+    if name == 'h1':
+        return 'search-title' in attrs.get('class', '').split()
+    return False
+
+
+RESULTS_STRAINER = SoupStrainer(is_results_element)
+
+
+def parse_full(content: str) -> BeautifulSoup:
+    return BeautifulSoup(content, 'html.parser')
+
+
+def parse_results(content: str) -> BeautifulSoup:
+    soup = BeautifulSoup(content, FAST_BACKEND, parse_only=RESULTS_STRAINER)
+    if soup.find():
+        return soup
+    # captcha and error pages have none of the result elements, keep the
+    # whole document so their text can still be inspected
+    return parse_full(content)
+
+
+parsers: Dict[str, Callable[[str], BeautifulSoup]] = {
+    'full': parse_full,
+    'fast': parse_results
+}
+
+
+def get_parser(name: str) -> Callable[[str], BeautifulSoup]:
+    if name not in parsers:
+        raise ValueError(f'Unknown parser {name}, choose from {list(parsers)}')
+    return parsers[name]
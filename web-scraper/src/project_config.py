@@ -2,6 +2,44 @@ URI = 'https://www.propertyguru.com.sg/'
 SCRAPER_INIT_RETRIES = 20
 SCRAPER_ERROR_RETRIES = 3
 MAX_PAGES = 5
+# shared batch searches leave price, size, build year and bedrooms to the
+# per-user filters, so matches sit among more results than a full search
+SHARED_MAX_PAGES = 10
+SCRAPER_CONCURRENCY = 4
+BATCH_CONCURRENCY = 4
+SCRAPER_PARSER = 'fast'
+SCRAPER_TIME_BUDGET = 600
+SCRAPER_TIME_MARGIN = 30
+
+CACHE_BACKEND = 'memory'
+# cached pages carry relative recency ('5m', '3h') that goes stale, so
+# they are only kept long enough to share a fetch between nearby runs
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 50
+CACHE_DIR = '/tmp/scraper-cache'
+CACHE_TABLE = 'ScraperCache'
+
+# 'dynamodb' in deployment, 'memory' only dedupes within a warm container
+SEEN_STORE = 'none'
+SEEN_TABLE = 'SeenListings'
+SEEN_TTL_SECONDS = 7 * 24 * 3600
+SEEN_CAPACITY = 1000
+SEEN_ERROR_RATE = 0.01
+SEEN_WINDOW_SLACK_HOURS = 1
+
+RETRY_POLICIES = {
+    'captcha': {
+        'max_attempts': SCRAPER_INIT_RETRIES,
+        'base_delay': 0.5,
+        'max_delay': 5,
+        'multiplier': 1.5
+    },
+    'connection': {
+        'max_attempts': SCRAPER_ERROR_RETRIES,
+        'base_delay': 5,
+        'max_delay': 60
+    }
+}
 
 preference_mapper = {
     'listing_type': {
@@ -87,6 +125,13 @@ query_mapper = {
     'district': 'district_code[]'
 }
 
+# listing field -> preference keys bounding it, checked after scraping
+range_filters = {
+    'price': ('min_price', 'max_price'),
+    'floor_size': ('min_floor_size', 'max_floor_size'),
+    'build_year': ('min_build_year', 'max_build_year')
+}
+
 numeric_cols = (
     'min_price',
     'max_price',
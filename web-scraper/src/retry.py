@@ -0,0 +1,85 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from src.project_config import RETRY_POLICIES
+
+CAPTCHA = 'captcha'
+CONNECTION_ERROR = 'connection'
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for a single class of error"""
+
+    def __init__(self, max_attempts: int,
+                 base_delay: float,
+                 max_delay: float,
+                 multiplier: float = 2.0,
+                 jitter: float = 0.5):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def get_delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+class Deadline:
+    """Wall-clock budget shared by every retry of a scraping run"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() == 0
+
+
+class Retrier:
+    """Counts attempts per error class and decides how long to back off.
+
+    A retry is refused once the policy for that error class runs out of
+    attempts, or when sleeping would overrun the deadline.
+    """
+
+    def __init__(self, deadline: Deadline,
+                 policies: Optional[Dict[str, RetryPolicy]] = None):
+        self.deadline = deadline
+        self.policies = policies or get_default_policies()
+        self.attempts = {kind: 0 for kind in self.policies}
+
+    def next_delay(self, kind: str) -> Optional[float]:
+        policy = self.policies[kind]
+        attempt = self.attempts[kind]
+        if attempt >= policy.max_attempts:
+            return None
+        self.attempts[kind] += 1
+        delay = policy.get_delay(attempt)
+        if delay >= self.deadline.remaining():
+            return None
+        return delay
+
+    def backoff(self, kind: str) -> bool:
+        delay = self.next_delay(kind)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    async def backoff_async(self, kind: str) -> bool:
+        delay = self.next_delay(kind)
+        if delay is None:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+
+def get_default_policies() -> Dict[str, RetryPolicy]:
+    return {
+        kind: RetryPolicy(**params) for kind, params in RETRY_POLICIES.items()
+    }
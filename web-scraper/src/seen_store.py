@@ -0,0 +1,182 @@
+"""Listings each user has already been sent, so scheduled runs only
+report new ones.
+
+Listings are recorded once the scraper has returned them in its response
+or queued them for the bot, not once the bot has delivered them. A
+failure after that point, such as the bot failing to send a message,
+still loses those listings, but anything that fails before it is offered
+again on the next run.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from src.listing import Listing
+from src.project_config import (
+    SEEN_CAPACITY,
+    SEEN_ERROR_RATE,
+    SEEN_STORE,
+    SEEN_TABLE,
+    SEEN_TTL_SECONDS
+)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int = SEEN_CAPACITY,
+                 error_rate: float = SEEN_ERROR_RATE,
+                 bits: Optional[bytes] = None,
+                 count: int = 0):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray(math.ceil(self.size / 8))
+        self.count = count
+
+    def get_positions(self, key: str):
+        digest = hashlib.sha256(key.encode()).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:16], 'big')
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self.get_positions(key):
+            self.bits[position // 8] |= 1 << (position % 8)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position // 8] & (1 << (position % 8))
+            for position in self.get_positions(key)
+        )
+
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class SeenSet:
+    """Two generations of Bloom filters. Once the current one fills up it
+    becomes the previous one, so old listings age out instead of pushing
+    the false positive rate up forever."""
+
+    def __init__(self, current: Optional[BloomFilter] = None,
+                 previous: Optional[BloomFilter] = None):
+        self.current = current or BloomFilter()
+        self.previous = previous
+
+    def add(self, key: str) -> None:
+        if self.current.is_full():
+            self.previous = self.current
+            self.current = BloomFilter()
+        self.current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        if key in self.current:
+            return True
+        return self.previous is not None and key in self.previous
+
+
+class MemorySeenStore:
+    def __init__(self):
+        self.seen_sets: Dict[str, SeenSet] = {}
+        self.lock = threading.Lock()
+
+    def load(self, user_id: str) -> SeenSet:
+        with self.lock:
+            return self.seen_sets.setdefault(user_id, SeenSet())
+
+    def save(self, user_id: str, seen_set: SeenSet) -> None:
+        with self.lock:
+            self.seen_sets[user_id] = seen_set
+
+
+class DynamoSeenStore:
+    """Persists each user's filters as binary attributes on one item.
+    expires_at is the table's TTL attribute and is pushed back on every
+    save, so only inactive users are dropped."""
+
+    def __init__(self, table_name: str = SEEN_TABLE):
+        import boto3
+
+        self.table = boto3.resource('dynamodb').Table(table_name)
+
+    def load(self, user_id: str) -> SeenSet:
+        item = self.table.get_item(Key={'user_id': user_id}).get('Item')
+        if not item:
+            return SeenSet()
+        current = BloomFilter(
+            bits=item['current'].value,
+            count=int(item['current_count'])
+        )
+        previous = None
+        if 'previous' in item:
+            previous = BloomFilter(bits=item['previous'].value)
+        return SeenSet(current, previous)
+
+    def save(self, user_id: str, seen_set: SeenSet) -> None:
+        item = {
+            'user_id': user_id,
+            'current': bytes(seen_set.current.bits),
+            'current_count': seen_set.current.count,
+            'expires_at': int(time.time() + SEEN_TTL_SECONDS)
+        }
+        if seen_set.previous is not None:
+            item['previous'] = bytes(seen_set.previous.bits)
+        self.table.put_item(Item=item)
+
+
+def get_listing_key(link: Listing) -> str:
+    # the id survives changes to a listing's title and url slug
+    return link.listing_id or link.url
+
+
+def filter_unseen(store, user_id, links: List[Listing]) -> List[Listing]:
+    """Drop listings already sent to the user. If the store is unavailable
+    every listing is treated as new."""
+    try:
+        seen_set = store.load(str(user_id))
+    except Exception as e:
+        print(e)
+        return links
+    unseen = [link for link in links if get_listing_key(link) not in seen_set]
+    print(f'{len(links) - len(unseen)} listings already seen by {user_id}')
+    return unseen
+
+
+def mark_seen(store, user_id, links: List[Listing]) -> None:
+    """Remember listings once they have been returned or queued"""
+    if not links:
+        return
+    try:
+        seen_set = store.load(str(user_id))
+        for link in links:
+            seen_set.add(get_listing_key(link))
+        store.save(str(user_id), seen_set)
+    except Exception as e:
+        print(e)
+
+
+stores = {
+    'memory': MemorySeenStore,
+    'dynamodb': DynamoSeenStore
+}
+
+_store = None
+
+
+def get_seen_store():
+    """Return the store selected by SEEN_STORE, or None if disabled"""
+    global _store
+    name = os.environ.get('SEEN_STORE', SEEN_STORE)
+    if name == 'none':
+        return
+    if _store is None:
+        _store = stores[name]()
+    return _store
+
+
+def reset_seen_store() -> None:
+    global _store
+    _store = None
@@ -0,0 +1,65 @@
+import json
+from typing import Callable, Dict, List, Optional
+
+SQS_BATCH_LIMIT = 10
+
+
+class CallbackSink:
+    """Hands each message to a function, for local runs and tests"""
+
+    def __init__(self, callback: Callable[[Dict], None]):
+        self.callback = callback
+
+    def send(self, messages: List[Dict]) -> List[Dict]:
+        for message in messages:
+            self.callback(message)
+        return []
+
+
+class QueueSink:
+    """SQS queue polled by the bot. Messages go out in batches of the
+    SendMessageBatch limit."""
+
+    def __init__(self, queue_url: str):
+        import boto3
+
+        self.queue_url = queue_url
+        self.sqs = boto3.client('sqs')
+
+    def send(self, messages: List[Dict]) -> List[Dict]:
+        """Queue the messages and return those that could not be"""
+        unsent = []
+        for i in range(0, len(messages), SQS_BATCH_LIMIT):
+            chunk = messages[i:i + SQS_BATCH_LIMIT]
+            entries = [
+                {'Id': str(j), 'MessageBody': json.dumps(message)}
+                for j, message in enumerate(chunk)
+            ]
+            response = self.sqs.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=entries
+            )
+            for failed in response.get('Failed', []):
+                print(f"Could not queue result: {failed.get('Message')}")
+                unsent.append(chunk[int(failed['Id'])])
+        return unsent
+
+
+_sink: Optional[QueueSink] = None
+
+
+def get_sink(queue_url: Optional[str]) -> Optional[QueueSink]:
+    """Return the queue the caller asked results to be streamed to, or
+    None to return them in the response instead. The bot names its own
+    queue in the event, so it only waits on a queue the scraper sends to."""
+    global _sink
+    if not queue_url:
+        return
+    if _sink is None or _sink.queue_url != queue_url:
+        _sink = QueueSink(queue_url)
+    return _sink
+
+
+def reset_sink() -> None:
+    global _sink
+    _sink = None
@@ -0,0 +1,115 @@
+import hashlib
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from src.project_config import (
+    preference_mapper,
+    query_mapper,
+    numeric_cols,
+    range_filters
+)
+
+Param = Tuple[str, str]
+Encoder = Callable[[object, Dict], List[Param]]
+
+# listing_type goes into the path, the rest are not part of the search
+SKIPPED_KEYS = ('user_id', 'job_frequency_hours', 'listing_type')
+FIXED_PARAMS = (('market', 'residential'), ('search', 'true'))
+# bounds that ListingColumns checks against the parsed listing cards
+LOCAL_FILTER_KEYS = (
+    *(key for bounds in range_filters.values() for key in bounds),
+    'bedrooms'
+)
+
+
+def encode_query(params: List[Param]) -> str:
+    """Sorted and percent encoded, so equal searches give equal strings"""
+    return urlencode(sorted(params), safe='[]')
+
+
+def canonicalise_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = encode_query(parse_qsl(parts.query))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+
+def get_search_hash(url: str) -> str:
+    """Stable id of a search, shared by every user who makes it"""
+    return hashlib.sha1(canonicalise_url(url).encode()).hexdigest()
+
+
+def format_number(value) -> str:
+    number = float(value)
+    return str(int(number)) if number.is_integer() else str(number)
+
+
+def numeric_encoder(name: str) -> Encoder:
+    def encode(value, preference: Dict) -> List[Param]:
+        return [(name, format_number(value))]
+    return encode
+
+
+def mapped_encoder(name: str, mapping: Dict) -> Encoder:
+    def encode(value, preference: Dict) -> List[Param]:
+        return [(name, mapping[value])]
+    return encode
+
+
+def property_type_code_encoder(name: str, mapping: Dict) -> Encoder:
+    # codes depend on the property type and may expand to several values
+    def encode(value, preference: Dict) -> List[Param]:
+        codes = mapping[preference['property_type']][value]
+        if isinstance(codes, str):
+            codes = [codes]
+        return [(name, code) for code in codes]
+    return encode
+
+
+def raw_encoder(name: str) -> Encoder:
+    def encode(value, preference: Dict) -> List[Param]:
+        return [(name, str(value))]
+    return encode
+
+
+def compile_encoders() -> Dict[str, Encoder]:
+    """Resolve each preference key's query name and value mapping once"""
+    encoders = {}
+    for key in {*query_mapper, *preference_mapper, *numeric_cols}:
+        if key in SKIPPED_KEYS:
+            continue
+        name = query_mapper.get(key, key)
+        if key == 'property_type_code':
+            encoders[key] = property_type_code_encoder(name, preference_mapper[key])
+        elif key in numeric_cols:
+            encoders[key] = numeric_encoder(name)
+        elif key in preference_mapper:
+            encoders[key] = mapped_encoder(name, preference_mapper[key])
+        else:
+            encoders[key] = raw_encoder(name)
+    return encoders
+
+
+ENCODERS = compile_encoders()
+LISTING_TYPES = preference_mapper['listing_type']
+
+
+def build_search_url(base: str, preference: Dict) -> str:
+    if 'listing_type' not in preference:
+        return ''
+    listing_type = LISTING_TYPES[preference['listing_type']]
+    params = [*FIXED_PARAMS, ('listing_type', listing_type)]
+    for key, value in preference.items():
+        if key in SKIPPED_KEYS:
+            continue
+        encoder = ENCODERS.get(key) or raw_encoder(key)
+        params += encoder(value, preference)
+    return f'{base}property-for-{listing_type}?{encode_query(params)}'
+
+
+def build_shared_search_url(base: str, preference: Dict) -> str:
+    """Search on the fields listing cards cannot be filtered by, so users
+    who only differ in price, size, build year or bedrooms share one
+    scrape and each apply their own bounds afterwards"""
+    return build_search_url(base, {
+        key: value for key, value in preference.items()
+        if key not in LOCAL_FILTER_KEYS
+    })
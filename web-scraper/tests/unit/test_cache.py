@@ -0,0 +1,56 @@
+import tempfile
+from unittest import main, TestCase, mock
+
+
+class TestCache(TestCase):
+    def tearDown(self) -> None:
+        from src.cache import reset_cache
+
+        reset_cache()
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        from src.cache import MemoryBackend
+
+        backend = MemoryBackend(max_entries=2)
+        backend.set('a', '1', 60)
+        backend.set('b', '2', 60)
+        backend.get('a')
+        backend.set('c', '3', 60)
+
+        self.assertEqual(backend.get('a'), '1')
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('c'), '3')
+
+    def test_backends_expire_entries(self):
+        from src.cache import FileBackend, MemoryBackend
+
+        with tempfile.TemporaryDirectory() as directory:
+            for backend in (MemoryBackend(), FileBackend(directory)):
+                backend.set('a', '1', 60)
+                self.assertEqual(backend.get('a'), '1')
+                with mock.patch('src.cache.time.time', return_value=2e9):
+                    self.assertIsNone(backend.get('a'))
+
+    def test_result_cache_counts_hits_and_misses(self):
+        from src.cache import MemoryBackend, ResultCache
+
+        cache = ResultCache(MemoryBackend())
+        cache.get('a')
+        cache.set('a', '1')
+        cache.get('a')
+
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_get_cache_follows_cache_backend(self):
+        from src.cache import MemoryBackend, get_cache
+
+        with mock.patch.dict('os.environ', {'CACHE_BACKEND': 'none'}):
+            self.assertIsNone(get_cache())
+        with mock.patch.dict('os.environ', {'CACHE_BACKEND': 'memory'}):
+            cache = get_cache()
+            self.assertIsInstance(cache.backend, MemoryBackend)
+            self.assertIs(get_cache(), cache)
+
+
+if __name__ == '__main__':
+    main()
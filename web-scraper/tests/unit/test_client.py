@@ -0,0 +1,28 @@
+from unittest import main, TestCase
+
+
+class TestClient(TestCase):
+    def tearDown(self) -> None:
+        from src.client import reset_clients
+
+        reset_clients()
+
+    def test_get_client_is_reused(self):
+        from src.client import get_client
+
+        client = get_client('token')
+
+        self.assertIs(get_client('token'), client)
+        self.assertIsNot(get_client('other-token'), client)
+
+    def test_reset_clients(self):
+        from src.client import get_client, reset_clients
+
+        client = get_client('token')
+        reset_clients()
+
+        self.assertIsNot(get_client('token'), client)
+
+
+if __name__ == '__main__':
+    main()
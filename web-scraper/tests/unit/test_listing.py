@@ -0,0 +1,63 @@
+from unittest import main, TestCase
+
+from bs4 import BeautifulSoup
+
+card = (
+    '<div itemtype="https://schema.org/Place" data-listing-id="24123456">'
+    '<a class="nav-link" title="Blk 123 Ang Mo Kio"'
+    ' href="https://www.propertyguru.com.sg/listing/hdb-for-sale-blk-123-24123456">'
+    'Blk 123 Ang Mo Kio</a>'
+    '<li class="list-price"><span class="currency">S$</span>'
+    '<span class="price">650,000</span></li>'
+    '<li class="listing-rooms"><span class="bed">3 <i></i></span>'
+    '<span class="bath">2 <i></i></span></li>'
+    '<li class="listing-floorarea">1,184 sqft</li>'
+    '<li class="listing-floorarea">S$ 549.00 psf</li>'
+    '<ul class="listing-property-type"><li>HDB Flat</li><li>Built: 1995</li></ul>'
+    '<div class="listing-recency">12m</div>'
+    '</div>'
+)
+
+
+class TestListing(TestCase):
+    def test_parse_listing(self):
+        from src.listing import parse_listing
+
+        unit = BeautifulSoup(card, 'html.parser').div
+        listing = parse_listing(unit, '12m')
+
+        self.assertEqual(listing.to_list(), [
+            'Blk 123 Ang Mo Kio',
+            'https://www.propertyguru.com.sg/listing/hdb-for-sale-blk-123-24123456',
+            '24123456',
+            650000,
+            1184,
+            3,
+            1995,
+            '12m'
+        ])
+
+    def test_parse_listing_missing_fields(self):
+        from src.listing import parse_listing
+
+        unit = BeautifulSoup(
+            '<div><a class="nav-link" title="Studio" href="/listing/studio-42">'
+            'Studio</a></div>',
+            'html.parser'
+        ).div
+        listing = parse_listing(unit, '3h')
+
+        self.assertEqual(listing.listing_id, '42')
+        self.assertIsNone(listing.price)
+        self.assertIsNone(listing.build_year)
+
+    def test_round_trip(self):
+        from src.listing import Listing
+
+        listing = Listing('A', '/listing/a-1', '1', 800000, 1000.5, 2, 2001, '5m')
+
+        self.assertEqual(Listing.from_list(listing.to_list()), listing)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+from unittest import main, TestCase
+
+preference = {
+    'min_price': 600000,
+    'max_price': 800000,
+    'min_floor_size': 1000,
+    'max_floor_size': 1400,
+    'min_build_year': 1980,
+    'max_build_year': 0,
+    'bedrooms': '3'
+}
+
+
+class TestListingFilter(TestCase):
+    def make_listings(self):
+        from src.listing import Listing
+
+        return [
+            Listing('match', '/a', price=700000, floor_size=1200,
+                    bedrooms=3, build_year=1995, recency='5m'),
+            Listing('too dear', '/b', price=900000, floor_size=1200,
+                    bedrooms=3, build_year=1995, recency='5m'),
+            Listing('too small', '/c', price=700000, floor_size=800,
+                    bedrooms=3, build_year=1995, recency='5m'),
+            Listing('too old', '/d', price=700000, floor_size=1200,
+                    bedrooms=3, build_year=1975, recency='5m'),
+            Listing('wrong rooms', '/e', price=700000, floor_size=1200,
+                    bedrooms=4, build_year=1995, recency='5m'),
+            Listing('unknown fields', '/f', recency='2h')
+        ]
+
+    def test_select_applies_every_bound(self):
+        from src.listing_filter import ListingColumns
+
+        columns = ListingColumns(self.make_listings())
+
+        self.assertEqual(
+            [listing.title for listing in columns.select(preference)],
+            ['match', 'unknown fields']
+        )
+
+    def test_select_applies_recency_window(self):
+        from src.listing_filter import ListingColumns
+
+        columns = ListingColumns(self.make_listings())
+
+        self.assertEqual(
+            [listing.title for listing in columns.select(preference, 1)],
+            ['match']
+        )
+        self.assertEqual(len(columns.select(preference, 3)), 2)
+
+    def test_bedroom_bounds(self):
+        from src.listing_filter import get_bedroom_bounds
+
+        self.assertEqual(get_bedroom_bounds('Studio'), (0, 0))
+        self.assertEqual(get_bedroom_bounds('5'), (5, None))
+        self.assertEqual(get_bedroom_bounds('2'), (2, 2))
+        # 0 is what the bot stores when bedrooms were never chosen
+        self.assertEqual(get_bedroom_bounds(0), (None, None))
+        self.assertEqual(get_bedroom_bounds('0'), (None, None))
+
+    def test_zero_bounds_are_unset(self):
+        from src.listing_filter import get_bounds
+
+        self.assertEqual(get_bounds({
+            'min_price': 0,
+            'max_price': 0.0,
+            'min_build_year': '0',
+            'bedrooms': 0
+        }), {})
+        self.assertEqual(get_bounds({'max_price': '900000'}), {
+            'price': (None, 900000.0)
+        })
+
+    def test_recency_hours(self):
+        from src.listing_filter import recency_hours
+
+        self.assertEqual(recency_hours('30m'), 0.5)
+        self.assertEqual(recency_hours('3h'), 3)
+        self.assertEqual(recency_hours('2d'), float('inf'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+from unittest import main, TestCase
+
+page = (
+    '<html><head><script>var captchaKey = 1;</script></head><body>'
+    '<h1 class="title search-title">1 - 20 of 35 Properties</h1>'
+    '<div class="header">Ads and navigation</div>'
+    '<div class="listing-card" itemtype="https://schema.org/Place">'
+    '<div class="listing-recency">2h</div>'
+    '<a class="nav-link" title="Unit A" href="/listing/a">Unit A</a>'
+    '</div>'
+    '<ul class="pagination"><li><a data-page="1">1</a></li>'
+    '<li><a data-page="2">2</a></li>'
+    '<li class="pagination-next"><a data-page="2">Next</a></li></ul>'
+    '</body></html>'
+)
+
+
+class TestParsers(TestCase):
+    def test_parse_results_keeps_only_result_elements(self):
+        from src.parsers import parse_full, parse_results
+
+        fast = parse_results(page)
+        full = parse_full(page)
+
+        self.assertIsNone(fast.find('div', class_='header'))
+        for soup in (fast, full):
+            card = soup.find('div', itemtype='https://schema.org/Place')
+            self.assertEqual(card.find('a', class_='nav-link')['href'], '/listing/a')
+            self.assertEqual(len(soup.find('ul', class_='pagination')('a')), 3)
+            self.assertIsNotNone(soup.find('h1', class_='title search-title'))
+
+    def test_parse_results_falls_back_to_full_document(self):
+        from src.parsers import parse_results
+
+        soup = parse_results('<html><body><p>Solve the captcha</p></body></html>')
+
+        self.assertIn('captcha', soup.text)
+
+    def test_get_parser_unknown(self):
+        from src.parsers import get_parser
+
+        with self.assertRaises(ValueError):
+            get_parser('regex')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+from unittest import main, TestCase, mock
+
+
+class TestRetry(TestCase):
+    def test_retry_policy_delay_is_capped(self):
+        from src.retry import RetryPolicy
+
+        policy = RetryPolicy(max_attempts=5, base_delay=1, max_delay=4, jitter=0)
+
+        delays = [policy.get_delay(attempt) for attempt in range(5)]
+
+        self.assertEqual(delays, [1, 2, 4, 4, 4])
+
+    def test_retrier_stops_after_max_attempts(self):
+        from src.retry import Deadline, Retrier, RetryPolicy
+
+        retrier = Retrier(
+            Deadline(60),
+            {'captcha': RetryPolicy(max_attempts=2, base_delay=0, max_delay=0)}
+        )
+
+        with mock.patch('src.retry.time.sleep'):
+            self.assertTrue(retrier.backoff('captcha'))
+            self.assertTrue(retrier.backoff('captcha'))
+            self.assertFalse(retrier.backoff('captcha'))
+
+    def test_retrier_respects_deadline(self):
+        from src.retry import Deadline, Retrier, RetryPolicy
+
+        retrier = Retrier(
+            Deadline(1),
+            {'connection': RetryPolicy(max_attempts=3, base_delay=60,
+                                       max_delay=60, jitter=0)}
+        )
+
+        self.assertIsNone(retrier.next_delay('connection'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+from unittest import main, TestCase, mock
+
+
+class TestSeenStore(TestCase):
+    def tearDown(self) -> None:
+        from src.seen_store import reset_seen_store
+
+        reset_seen_store()
+
+    def test_bloom_filter_membership(self):
+        from src.seen_store import BloomFilter
+
+        bloom = BloomFilter(capacity=100, error_rate=0.01)
+        for i in range(100):
+            bloom.add(f'/listing/{i}')
+
+        for i in range(100):
+            self.assertIn(f'/listing/{i}', bloom)
+        false_positives = sum(f'/other/{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_bloom_filter_round_trips_through_bytes(self):
+        from src.seen_store import BloomFilter
+
+        bloom = BloomFilter()
+        bloom.add('/listing/1')
+        restored = BloomFilter(bits=bytes(bloom.bits), count=bloom.count)
+
+        self.assertIn('/listing/1', restored)
+        self.assertEqual(restored.count, 1)
+
+    def test_seen_set_rotates_generations(self):
+        from src.seen_store import BloomFilter, SeenSet
+
+        seen_set = SeenSet(BloomFilter(capacity=2))
+        for key in ('a', 'b', 'c'):
+            seen_set.add(key)
+
+        self.assertEqual(seen_set.current.count, 1)
+        for key in ('a', 'b', 'c'):
+            self.assertIn(key, seen_set)
+
+    def test_filter_unseen(self):
+        from src.listing import Listing
+        from src.seen_store import MemorySeenStore, filter_unseen, mark_seen
+
+        store = MemorySeenStore()
+        a, b, c = (Listing(x, f'/listing/{x}', listing_id=x) for x in 'abc')
+        first = [a, b]
+        second = [b, c]
+
+        self.assertEqual(filter_unseen(store, 1, first), first)
+        # nothing is remembered until it has been sent
+        self.assertEqual(filter_unseen(store, 1, first), first)
+        mark_seen(store, 1, first)
+        self.assertEqual(filter_unseen(store, 1, second), [c])
+        self.assertEqual(filter_unseen(store, 2, second), second)
+
+    def test_filter_unseen_keys_by_listing_id(self):
+        from src.listing import Listing
+        from src.seen_store import MemorySeenStore, filter_unseen, mark_seen
+
+        store = MemorySeenStore()
+        mark_seen(store, 1, [Listing('A', '/listing/a-1', listing_id='1')])
+        renamed = [Listing('A!', '/listing/a-renamed-1', listing_id='1')]
+
+        self.assertEqual(filter_unseen(store, 1, renamed), [])
+
+    def test_remove_seen_uses_configured_store(self):
+        from src.lambda_function import record_seen, remove_seen
+        from src.listing import Listing
+
+        links = [Listing('A', '/listing/a-1', listing_id='1')]
+
+        with mock.patch.dict('os.environ', {'SEEN_STORE': 'none'}):
+            record_seen(1, links)
+            self.assertEqual(remove_seen(1, links), links)
+        with mock.patch.dict('os.environ', {'SEEN_STORE': 'memory'}):
+            self.assertEqual(remove_seen(1, links), links)
+            record_seen(1, links)
+            self.assertEqual(remove_seen(1, links), [])
+
+
+if __name__ == '__main__':
+    main()
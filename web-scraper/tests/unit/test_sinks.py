@@ -0,0 +1,47 @@
+import os
+from unittest import main, TestCase, mock
+
+
+class TestSinks(TestCase):
+    def tearDown(self) -> None:
+        from src.sinks import reset_sink
+
+        reset_sink()
+
+    def test_get_sink_follows_event_queue_url(self):
+        from src.sinks import QueueSink, get_sink
+
+        self.assertIsNone(get_sink(None))
+        self.assertIsNone(get_sink(''))
+        with mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'ap-southeast-1'}):
+            sink = get_sink('https://sqs.test/results')
+            self.assertIsInstance(sink, QueueSink)
+            self.assertIs(get_sink('https://sqs.test/results'), sink)
+            self.assertEqual(
+                get_sink('https://sqs.test/other').queue_url,
+                'https://sqs.test/other'
+            )
+
+    def test_queue_sink_sends_in_batches(self):
+        from src.sinks import QueueSink
+
+        with mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'ap-southeast-1'}):
+            sink = QueueSink('https://sqs.test/results')
+        sink.sqs = mock.Mock()
+        sink.sqs.send_message_batch.side_effect = [
+            {},
+            {'Failed': [{'Id': '1', 'Message': 'throttled'}]}
+        ]
+
+        unsent = sink.send([{'user_id': i} for i in range(12)])
+
+        batches = [
+            c.kwargs['Entries'] for c in sink.sqs.send_message_batch.call_args_list
+        ]
+        self.assertEqual([len(entries) for entries in batches], [10, 2])
+        self.assertEqual(batches[1][1]['MessageBody'], '{"user_id": 11}')
+        self.assertEqual(unsent, [{'user_id': 11}])
+
+
+if __name__ == '__main__':
+    main()
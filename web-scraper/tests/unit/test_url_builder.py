@@ -0,0 +1,58 @@
+import json
+from unittest import main, TestCase
+
+uri = 'https://www.propertyguru.com.sg/'
+
+
+class TestUrlBuilder(TestCase):
+    def test_canonicalise_url_sorts_query(self):
+        from src.url_builder import canonicalise_url
+
+        first = canonicalise_url('https://a.com/p?b=2&a=1&c[]=3')
+        second = canonicalise_url('https://a.com/p?c[]=3&a=1&b=2')
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, 'https://a.com/p?a=1&b=2&c[]=3')
+
+    def test_build_search_url_is_canonical(self):
+        from src.url_builder import build_search_url
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            preference = json.load(f)
+        reordered = dict(reversed(list(preference.items())))
+        reordered['min_price'] = 600000.0
+
+        self.assertEqual(
+            build_search_url(uri, preference),
+            build_search_url(uri, reordered)
+        )
+
+    def test_build_search_url_encodes_values(self):
+        from src.url_builder import build_search_url
+
+        url = build_search_url(uri, {
+            'listing_type': 'Rent',
+            'property_type': 'Condo',
+            'property_type_code': 'Condo',
+            'keywords': 'sea view & pool'
+        })
+
+        self.assertEqual(
+            url,
+            f'{uri}property-for-rent?keywords=sea+view+%26+pool'
+            '&listing_type=rent&market=residential&property_type=N'
+            '&property_type_code[]=CONDO&search=true'
+        )
+
+    def test_get_search_hash_ignores_parameter_order(self):
+        from src.url_builder import get_search_hash
+
+        first = get_search_hash('https://a.com/p?b=2&a=1')
+        second = get_search_hash('https://a.com/p?a=1&b=2')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, get_search_hash('https://a.com/p?a=1&b=3'))
+
+
+if __name__ == '__main__':
+    main()
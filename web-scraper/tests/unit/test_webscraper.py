@@ -0,0 +1,181 @@
+import asyncio
+import time
+from unittest import main, TestCase, mock
+
+url = 'https://www.propertyguru.com.sg/property-for-sale' + \
+    '?market=residential&listing_type=sale&search=true'
+
+
+def make_page(titles, recency='5m', pages=3):
+    cards = ''
+    for title in titles:
+        cards += (
+            '<div itemtype="https://schema.org/Place">'
+            f'<div class="listing-recency">{recency}</div>'
+            f'<a class="nav-link" title="{title}" href="/listing/{title}">'
+            f'{title}</a>'
+            '</div>'
+        )
+    pagination = '<ul class="pagination">'
+    for page in range(1, pages + 1):
+        pagination += f'<li><a data-page="{page}">{page}</a></li>'
+    pagination += '<li class="pagination-next"><a data-page="2">Next</a></li>'
+    pagination += '</ul>'
+    return f'<html><body>{cards}{pagination}</body></html>'
+
+
+def fake_fetch_content(self, url):
+    # later pages respond faster than earlier ones to shuffle completion order
+    page = 1
+    if '/property-for-sale/' in url:
+        page = int(url.split('/property-for-sale/')[1].split('?')[0])
+    time.sleep(0.05 / page)
+    return make_page([f'page-{page}'])
+
+
+fetched = []
+
+
+def fake_fetch_old_from_page_2(self, url):
+    fetched.append(url)
+    if '/property-for-sale/' in url:
+        return make_page(['old'], recency='3h')
+    return make_page(['new'])
+
+
+class TestWebScraper(TestCase):
+    def setUp(self) -> None:
+        fetched.clear()
+
+    def test_get_page_url(self):
+        from src.WebScraper import WebScraper
+
+        with mock.patch.object(WebScraper, 'fetch_content', fake_fetch_content):
+            scraper = WebScraper(url=url, frequency_hours=1, token='')
+
+        self.assertEqual(scraper.get_page_url(1), url)
+        self.assertEqual(
+            scraper.get_page_url(3),
+            'https://www.propertyguru.com.sg/property-for-sale/3'
+            '?market=residential&listing_type=sale&search=true'
+        )
+
+    def test_scrape_pages_async_keeps_page_order(self):
+        from src.WebScraper import WebScraper
+
+        with mock.patch.object(WebScraper, 'fetch_content', fake_fetch_content):
+            scraper = WebScraper(url=url, frequency_hours=1, token='')
+            links = asyncio.run(scraper.scrape_pages_async(concurrency=3))
+            sync_links = scraper.scrape_pages()
+
+        self.assertEqual(
+            [link.title for link in links],
+            ['page-1', 'page-2', 'page-3']
+        )
+        self.assertEqual(links, sync_links)
+
+    def test_iter_pages_yields_each_page(self):
+        from src.WebScraper import WebScraper
+
+        def fetch(self, url):
+            fetched.append(url)
+            return fake_fetch_content(self, url)
+
+        with mock.patch.object(WebScraper, 'fetch_content', fetch):
+            scraper = WebScraper(url=url, frequency_hours=1, token='')
+            pages = scraper.iter_pages()
+            page, links = next(pages)
+            # later pages are only fetched once the caller asks for them
+            self.assertEqual(len(fetched), 1)
+            rest = list(pages)
+
+        self.assertEqual((page, [link.title for link in links]), (1, ['page-1']))
+        self.assertEqual(
+            [(page, [link.title for link in links]) for page, links in rest],
+            [(2, ['page-2']), (3, ['page-3'])]
+        )
+
+    def test_iter_pages_async_yields_pages_as_they_complete(self):
+        from src.WebScraper import WebScraper
+
+        async def collect(scraper):
+            return [
+                (page, [link.title for link in links])
+                async for page, links in scraper.iter_pages_async(concurrency=3)
+            ]
+
+        with mock.patch.object(WebScraper, 'fetch_content', fake_fetch_content):
+            scraper = WebScraper(url=url, frequency_hours=1, token='')
+            pages = asyncio.run(collect(scraper))
+
+        # page 3 responds faster than page 2
+        self.assertEqual(
+            pages,
+            [(1, ['page-1']), (3, ['page-3']), (2, ['page-2'])]
+        )
+
+    def test_scrape_pages_stops_after_recency_window(self):
+        from src.WebScraper import WebScraper
+
+        with mock.patch.object(WebScraper, 'fetch_content',
+                               fake_fetch_old_from_page_2):
+            scraper = WebScraper(url=url, frequency_hours=1, token='')
+            links = scraper.scrape_pages()
+
+        self.assertEqual([link.url for link in links], ['/listing/new'])
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(scraper.fetches_saved, 1)
+
+    def test_scrape_pages_async_stops_after_recency_window(self):
+        from src.WebScraper import WebScraper
+
+        with mock.patch.object(WebScraper, 'fetch_content',
+                               fake_fetch_old_from_page_2):
+            scraper = WebScraper(url=url, frequency_hours=1, token='')
+            links = asyncio.run(scraper.scrape_pages_async(concurrency=1))
+
+        self.assertEqual([link.url for link in links], ['/listing/new'])
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(scraper.fetches_saved, 1)
+
+    def test_create_soup_gives_up_on_captcha(self):
+        from src.WebScraper import WebScraper
+
+        captcha = '<p>captcha</p>'
+        with mock.patch.object(WebScraper, 'fetch_content', return_value=captcha), \
+                mock.patch('src.retry.time.sleep') as sleep:
+            scraper = WebScraper(url=url, frequency_hours=1, token='')
+
+        self.assertIsNone(scraper.soup)
+        self.assertEqual(scraper.get_number_of_pages(), 0)
+        self.assertEqual(sleep.call_count, 20)
+
+    def test_create_soup_uses_cache(self):
+        from src.cache import MemoryBackend, ResultCache
+        from src.WebScraper import WebScraper
+
+        cache = ResultCache(MemoryBackend())
+        with mock.patch.object(WebScraper, 'fetch_content', fake_fetch_content):
+            WebScraper(url=url, frequency_hours=1, token='', cache=cache)
+        with mock.patch.object(WebScraper, 'fetch_content') as fetch_content:
+            scraper = WebScraper(url=url, frequency_hours=1, token='', cache=cache)
+
+        fetch_content.assert_not_called()
+        self.assertEqual(scraper.get_links(scraper.soup)[0].title, 'page-1')
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_create_soup_does_not_cache_captcha(self):
+        from src.cache import MemoryBackend, ResultCache
+        from src.WebScraper import WebScraper
+
+        cache = ResultCache(MemoryBackend())
+        with mock.patch.object(WebScraper, 'fetch_content',
+                               return_value='<p>captcha</p>'), \
+                mock.patch('src.retry.time.sleep'):
+            WebScraper(url=url, frequency_hours=1, token='', cache=cache)
+
+        self.assertEqual(cache.backend.entries, {})
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
 import json
-from unittest import main, TestCase
+import os
+from unittest import main, TestCase, mock
 
 uri = 'https://www.propertyguru.com.sg/'
+queue_url = 'https://sqs.test/results'
 
 
 class TestWebscraperLambda(TestCase):
@@ -42,6 +44,208 @@ class TestWebscraperLambda(TestCase):
 
         self.assertEqual(url, '')
 
+    def test_group_searches_deduplicates_urls(self):
+        from src.lambda_function import group_searches
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            first = json.load(f)
+        with open('tests/test_events/success_listing_not_first.json', 'r') as f:
+            second = json.load(f)
+        second['user_id'] = 2
+
+        searches, failed = group_searches([first, second])
+
+        self.assertEqual(len(searches), 1)
+        self.assertEqual(list(searches.values())[0], [first, second])
+        self.assertEqual(failed, [])
+
+    def test_group_searches_shares_scrapes_across_bounds(self):
+        from src.lambda_function import create_url, group_searches
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            first = json.load(f)
+        cheaper = dict(first, user_id=2, max_price=500000, bedrooms='Studio')
+        elsewhere = dict(first, user_id=3, district='D20')
+
+        searches, _ = group_searches([first, cheaper, elsewhere])
+
+        # price and bedrooms are applied per user, the district is not
+        self.assertEqual(list(searches.values()), [[first, cheaper], [elsewhere]])
+        shared_url, lone_url = searches
+        self.assertNotIn('maxprice', shared_url)
+        self.assertNotIn('beds', shared_url)
+        # a search nobody shares keeps every bound
+        self.assertEqual(lone_url, create_url(uri, elsewhere))
+
+    @mock.patch.dict(os.environ, {'SCRAPING_ANT_TOKEN': 'token'})
+    def test_batch_handler_isolates_malformed_preference(self):
+        from src import lambda_function
+        from src.listing import Listing
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            first = json.load(f)
+        malformed = dict(first, user_id=2, property_type_code='UNKNOWN')
+        unit_a = Listing('Unit A', '/listing/a-1', '1', 800000, recency='5m')
+
+        with mock.patch.object(lambda_function, 'scrape',
+                               mock.AsyncMock(return_value=[unit_a])):
+            response = lambda_function.lambda_handler(
+                {'preferences': [malformed, first]}, ''
+            )
+        body = json.loads(response['body'])
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(
+            [(result['user_id'], result['statusCode']) for result in body],
+            [(1, 200), (2, 500)]
+        )
+        self.assertEqual(body[0]['links'], [unit_a.to_list()])
+        self.assertEqual(body[1]['links'], [])
+
+    @mock.patch.dict(os.environ, {'SCRAPING_ANT_TOKEN': 'token'})
+    def test_batch_handler_returns_per_user_results(self):
+        from src import lambda_function
+        from src.listing import Listing
+        from src.project_config import SHARED_MAX_PAGES
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            first = json.load(f)
+        second = dict(first, user_id=2)
+        third = dict(first, user_id=3, job_frequency_hours=3)
+        unit_a = Listing('Unit A', '/listing/a-1', '1', 800000, recency='5m')
+        too_dear = Listing('Unit B', '/listing/b-2', '2', 900000, recency='5m')
+        older = Listing('Unit C', '/listing/c-3', '3', 700000, recency='2h')
+        links = [unit_a, too_dear, older]
+
+        with mock.patch.object(lambda_function, 'scrape',
+                               mock.AsyncMock(return_value=links)) as scrape:
+            response = lambda_function.lambda_handler(
+                {'preferences': [first, second, third]}, ''
+            )
+        body = json.loads(response['body'])
+
+        self.assertEqual(response['statusCode'], 200)
+        # one scrape over the widest window serves every frequency, and
+        # reaches further since it is shared
+        self.assertEqual(scrape.await_count, 1)
+        self.assertEqual(scrape.await_args.args[1], 3)
+        self.assertEqual(scrape.await_args.args[4], SHARED_MAX_PAGES)
+        self.assertEqual([result['user_id'] for result in body], [1, 2, 3])
+        for result in body:
+            self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(body[0]['links'], [unit_a.to_list()])
+        self.assertEqual(body[1]['links'], [unit_a.to_list()])
+        self.assertEqual(body[2]['links'], [unit_a.to_list(), older.to_list()])
+
+    @mock.patch.dict(os.environ, {'SCRAPING_ANT_TOKEN': 'token'})
+    def test_batch_handler_streams_pages_to_sink(self):
+        from src import lambda_function
+        from src.listing import Listing
+        from src.sinks import CallbackSink
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            first = json.load(f)
+        second = dict(first, user_id=2, job_frequency_hours=3)
+        pages = [
+            (1, [Listing('Unit A', '/listing/a-1', '1', 800000, recency='5m')]),
+            (2, [Listing('Unit B', '/listing/b-2', '2', 700000, recency='2h')])
+        ]
+        messages = []
+
+        async def iter_pages_async(concurrency):
+            for page in pages:
+                yield page
+
+        scraper = mock.Mock(iter_pages_async=iter_pages_async)
+
+        with mock.patch.object(lambda_function, 'create_scraper',
+                               return_value=scraper) as create_scraper, \
+                mock.patch.object(lambda_function, 'get_sink',
+                                  return_value=CallbackSink(messages.append)
+                                  ) as get_sink:
+            response = lambda_function.lambda_handler(
+                {'preferences': [first, second], 'result_queue_url': queue_url},
+                ''
+            )
+        body = json.loads(response['body'])
+
+        # streams to the queue the caller named
+        get_sink.assert_called_once_with(queue_url)
+        # one scrape over the widest window, each user gets their share
+        self.assertEqual(create_scraper.call_count, 1)
+        self.assertEqual(
+            [(m['user_id'], m['page'], m['final']) for m in messages],
+            [(1, 1, False), (2, 1, False), (2, 2, False),
+             (1, None, True), (2, None, True)]
+        )
+        self.assertEqual(messages[0]['links'][0][0], 'Unit A')
+        self.assertEqual(
+            [(result['user_id'], result['total']) for result in body],
+            [(1, 1), (2, 2)]
+        )
+
+    @mock.patch.dict(os.environ, {'SCRAPING_ANT_TOKEN': 'token',
+                                  'SEEN_STORE': 'memory'})
+    def test_batch_handler_records_only_queued_listings(self):
+        from src import lambda_function
+        from src.listing import Listing
+        from src.seen_store import get_seen_store, reset_seen_store
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            first = json.load(f)
+        second = dict(first, user_id=2)
+        unit_a = Listing('Unit A', '/listing/a-1', '1', 800000, recency='5m')
+
+        async def iter_pages_async(concurrency):
+            yield 1, [unit_a]
+
+        sink = mock.Mock()
+        # the queue rejects the message for user 2
+        sink.send.side_effect = lambda messages: [
+            m for m in messages if m['user_id'] == 2
+        ]
+        self.addCleanup(reset_seen_store)
+
+        with mock.patch.object(lambda_function, 'create_scraper',
+                               return_value=mock.Mock(
+                                   iter_pages_async=iter_pages_async)), \
+                mock.patch.object(lambda_function, 'get_sink',
+                                  return_value=sink):
+            response = lambda_function.lambda_handler(
+                {'preferences': [first, second], 'result_queue_url': queue_url},
+                ''
+            )
+        body = json.loads(response['body'])
+
+        self.assertEqual(
+            [(result['user_id'], result['total']) for result in body],
+            [(1, 1), (2, 0)]
+        )
+        store = get_seen_store()
+        self.assertIn('1', store.load('1'))
+        self.assertNotIn('1', store.load('2'))
+
+    @mock.patch.dict(os.environ, {'SCRAPING_ANT_TOKEN': 'token'})
+    def test_batch_handler_streams_failure(self):
+        from src import lambda_function
+        from src.sinks import CallbackSink
+
+        with open('tests/test_events/success_listing_first.json', 'r') as f:
+            first = json.load(f)
+        messages = []
+
+        with mock.patch.object(lambda_function, 'create_scraper',
+                               side_effect=Exception('blocked')), \
+                mock.patch.object(lambda_function, 'get_sink',
+                                  return_value=CallbackSink(messages.append)):
+            lambda_function.lambda_handler(
+                {'preferences': [first], 'result_queue_url': queue_url}, ''
+            )
+
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(messages[0]['final'])
+        self.assertEqual(messages[0]['statusCode'], 500)
+
 
 if __name__ == '__main__':
     main()